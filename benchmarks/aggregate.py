@@ -0,0 +1,55 @@
+"""
+Compare aggregate() with the previous list comprehension and reduce implementation.
+
+python -m benchmarks.aggregate
+"""
+
+import timeit
+from functools import reduce
+from typing import List, Tuple
+
+import numpy as np
+
+from myhdf5.aggregate import aggregate, aggregate_median, aggregate_trimmed_mean
+
+
+def aggregate_reduce(results: List[Tuple[List[np.ndarray], int]]) -> List[np.ndarray]:
+    num_examples_total = sum([num_examples for _, num_examples in results])
+    weighted_weights = [
+        [layer * num_examples for layer in weights] for weights, num_examples in results
+    ]
+    return [
+        reduce(np.add, layer_updates) / num_examples_total
+        for layer_updates in zip(*weighted_weights)
+    ]
+
+
+def make_results(clients=10, layers=20, size=100_000, dtype=np.float32):
+    rng = np.random.default_rng(0)
+    return [
+        ([rng.standard_normal(size).astype(dtype) for _ in range(layers)], i + 1)
+        for i in range(clients)
+    ]
+
+
+def main(number=5):
+    results = make_results()
+    cases = {
+        "reduce (previous)": lambda: aggregate_reduce(results),
+        "aggregate": lambda: aggregate(results),
+        "aggregate float64": lambda: aggregate(results, dtype=np.float64),
+        "aggregate_median": lambda: aggregate_median(results),
+        "aggregate_trimmed_mean": lambda: aggregate_trimmed_mean(results),
+    }
+    for name, func in cases.items():
+        sec = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print(f"{name:<24} {sec * 1000:8.2f} ms")
+
+    expect = aggregate_reduce(results)
+    actual = aggregate(results)
+    error = max(float(np.abs(x - y).max()) for x, y in zip(expect, actual))
+    print(f"max abs difference       {error:.3e}")
+
+
+if __name__ == "__main__":
+    main()
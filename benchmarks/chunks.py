@@ -0,0 +1,38 @@
+"""
+Wall time of compressed save_weights / load by number of workers.
+
+python -m benchmarks.chunks
+"""
+
+import os
+import time
+
+import numpy as np
+
+from myhdf5 import TempModelStore
+
+
+def main(layers=50, shape=(512, 512)):
+    rng = np.random.default_rng(0)
+    weights = [
+        np.round(rng.standard_normal(shape), 2).astype(np.float32)
+        for _ in range(layers)
+    ]
+
+    with TempModelStore() as store:
+        for workers in [0, 1, 2, 4, os.cpu_count()]:
+            f = store.file()
+            start = time.perf_counter()
+            f.save_weights(weights, compression="gzip", workers=workers)
+            saved = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with f.load_with(workers=workers) as loaded:
+                for _ in loaded:
+                    ...
+            load = time.perf_counter() - start
+            print(f"workers={workers:<3} save {saved:6.3f}s  load {load:6.3f}s")
+
+
+if __name__ == "__main__":
+    main()
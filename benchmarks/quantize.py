@@ -0,0 +1,50 @@
+"""
+Size reduction and aggregate() drift of quantized weights on synthetic layers.
+
+python -m benchmarks.quantize
+"""
+
+import os
+
+import numpy as np
+
+from myhdf5 import TempModelStore
+from myhdf5.aggregate import aggregate
+
+ENCODINGS = [
+    (None, None),
+    ("float16", None),
+    ("bfloat16", None),
+    ("int8", None),
+    ("int8", -1),
+]
+
+
+def make_weights(rng, layers=10, shape=(256, 256)):
+    return [rng.standard_normal(shape).astype(np.float32) * 0.05 for _ in range(layers)]
+
+
+def main(clients=5):
+    rng = np.random.default_rng(0)
+    results = [(make_weights(rng), i + 1) for i in range(clients)]
+    expect = aggregate(results)
+
+    with TempModelStore() as store:
+        for quantize, channel_axis in ENCODINGS:
+            files = []
+            for weights, num_examples in results:
+                f = store.file()
+                f.save_weights(weights, quantize=quantize, channel_axis=channel_axis)
+                files.append((f, num_examples))
+
+            size = sum(os.path.getsize(f) for f, _ in files)
+            loaded = [(f.load(map=list), n) for f, n in files]
+            actual = aggregate(loaded)
+            drift = max(float(np.abs(x - y).max()) for x, y in zip(expect, actual))
+
+            name = f"{quantize}" + ("" if channel_axis is None else " per channel")
+            print(f"{name:<18} {size / 1024 / 1024:8.2f} MiB  max drift {drift:.3e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,2 @@
 from .abc import BaseSerializer
-from .store import ModelFile, TempModelStore
+from .store import ModelFile, ModelFileSet, TempModelStore
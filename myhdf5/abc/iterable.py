@@ -1,6 +1,70 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
 class ReIterable:
-    def __init__(self, generator_function):
+    def __init__(self, generator_function, prefetch: int = 0):
         self.func = generator_function
+        self.prefetch = prefetch
 
     def __iter__(self):
+        if self.prefetch > 0:
+            return prefetch(self.func(), self.prefetch)
         return self.func()
+
+    def with_prefetch(self, size: int) -> "ReIterable":
+        """Read up to `size` items ahead on a background thread while iterating."""
+        return ReIterable(self.func, prefetch=size)
+
+
+_ITEM, _DONE, _ERROR = 0, 1, 2
+
+
+def prefetch(iterable: Iterable[T], size: int) -> Iterator[T]:
+    """Iterate `iterable` on a background thread through a queue bounded by `size`.
+
+    The thread stops when the consumer stops early (the generator is closed),
+    and exceptions of the thread are raised to the consumer.
+    """
+    q: queue.Queue = queue.Queue(maxsize=size)
+    cancelled = threading.Event()
+
+    def put(msg) -> bool:
+        while not cancelled.is_set():
+            try:
+                q.put(msg, timeout=0.05)
+                return True
+            except queue.Full:
+                ...
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((_ITEM, item)):
+                    break
+            else:
+                put((_DONE, None))
+        except BaseException as e:
+            put((_ERROR, e))
+        finally:
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = q.get()
+            if kind == _DONE:
+                return
+            elif kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        cancelled.set()
+        thread.join()
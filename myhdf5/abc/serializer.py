@@ -9,6 +9,7 @@ class BaseSerializer:
     # name
     priority = 0
     track_order = False
+    verify_on_read = False  # deserialize accepts `verify`
 
     @property
     def get_name(self):
@@ -1,22 +1,271 @@
-from functools import reduce
-from typing import List, Tuple
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
 
+import h5py
 import numpy as np
 
+from .directory import atomic_temp_name, commit_file
+from .serializers.impl import row_name
+from .sparse import SparseLayer
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # elements per layer processed at once
+
+
+def _check_floating(dtype):
+    # the sums are divided in place by the number of examples
+    if dtype is not None and not np.issubdtype(np.dtype(dtype), np.inexact):
+        raise ValueError(f"dtype must be a floating point type: {np.dtype(dtype)}")
+
+
+def _accumulator_dtype(layer: np.ndarray, dtype=None) -> np.dtype:
+    # keep float precision, promote integers so that weighting does not overflow
+    if dtype is not None:
+        return np.dtype(dtype)
+    return np.promote_types(layer.dtype, np.float32)
+
+
+def _accumulate(acc: np.ndarray, buf: np.ndarray, layer, weight):
+    # acc += layer * weight. sparse layers are added without densifying
+    if isinstance(layer, SparseLayer):
+        layer.accumulate(acc, weight)
+    else:
+        np.multiply(layer, weight, out=buf, dtype=buf.dtype)
+        np.add(acc, buf, out=acc)
+
+
+def _as_lists(results) -> List[Tuple[List[np.ndarray], int]]:
+    results = [(list(weights), num_examples) for weights, num_examples in results]
+    if not results:
+        raise ValueError("results is empty.")
+    return results
+
+
+def aggregate(
+    results: List[Tuple[List[np.ndarray], int]], dtype=None
+) -> List[np.ndarray]:
+    """Compute weighted average.
+
+    Layers are accumulated in place into preallocated buffers of `dtype`
+    (default: the layer dtype promoted to floating point).
+    """
+    _check_floating(dtype)
+    results = _as_lists(results)
 
-def aggregate(results: List[Tuple[List[np.ndarray], int]]) -> List[np.ndarray]:
-    """Compute weighted average."""
     # Calculate the total number of examples used during training
     num_examples_total = sum([num_examples for _, num_examples in results])
 
-    # Create a list of weights, each multiplied by the related number of examples
-    weighted_weights = [
-        [layer * num_examples for layer in weights] for weights, num_examples in results
+    first, _ = results[0]
+    accumulators = [
+        np.zeros(layer.shape, dtype=_accumulator_dtype(layer, dtype)) for layer in first
     ]
+    buffers = [np.empty_like(x) for x in accumulators]
 
-    # Compute average weights of each layer
-    weights_prime: List[np.ndarray] = [
-        reduce(np.add, layer_updates) / num_examples_total
-        for layer_updates in zip(*weighted_weights)
-    ]
+    # Sum weights of each layer, multiplied by the related number of examples
+    for weights, num_examples in results:
+        if len(weights) != len(accumulators):
+            raise ValueError("Number of layers does not match.")
+        for acc, buf, layer in zip(accumulators, buffers, weights):
+            _accumulate(acc, buf, layer, num_examples)
+
+    for acc in accumulators:
+        np.divide(acc, num_examples_total, out=acc)
+
+    return accumulators
+
+
+def _reduce_chunked(results, func, dtype, chunk_size) -> List[np.ndarray]:
+    # stack layers of all clients chunk by chunk to bound the temporary memory
+    results = _as_lists(results)
+    layers = list(zip(*(weights for weights, _ in results)))
+    weights_prime = []
+    for layer_updates in layers:
+        shape = layer_updates[0].shape
+        out_dtype = _accumulator_dtype(layer_updates[0], dtype)
+        out = np.empty(shape, dtype=out_dtype)
+        flat_out = out.reshape(-1)
+        flats = [
+            (x.todense() if isinstance(x, SparseLayer) else np.asarray(x)).reshape(-1)
+            for x in layer_updates
+        ]
+        stacked = np.empty((len(flats), min(chunk_size, flat_out.size)), out_dtype)
+        for start in range(0, flat_out.size, chunk_size):
+            stop = min(start + chunk_size, flat_out.size)
+            chunk = stacked[:, : stop - start]
+            for i, flat in enumerate(flats):
+                chunk[i] = flat[start:stop]
+            flat_out[start:stop] = func(chunk)
+        weights_prime.append(out)
     return weights_prime
+
+
+def aggregate_median(
+    results: List[Tuple[List[np.ndarray], int]],
+    dtype=None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[np.ndarray]:
+    """Compute coordinate-wise median. The number of examples is ignored."""
+
+    def median(x: np.ndarray):
+        # sorting the few clients per coordinate is faster than np.median
+        x.sort(axis=0)
+        n = x.shape[0]
+        if n % 2:
+            return x[n // 2]
+        return (x[n // 2 - 1] + x[n // 2]) / 2
+
+    return _reduce_chunked(results, median, dtype=dtype, chunk_size=chunk_size)
+
+
+def aggregate_trimmed_mean(
+    results: List[Tuple[List[np.ndarray], int]],
+    proportiontocut: float = 0.1,
+    dtype=None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[np.ndarray]:
+    """Compute coordinate-wise mean after cutting `proportiontocut` from both ends."""
+    if not (0 <= proportiontocut < 0.5):
+        raise ValueError("proportiontocut must be in [0, 0.5).")
+
+    def trimmed_mean(x: np.ndarray):
+        cut = int(proportiontocut * x.shape[0])
+        if cut:
+            x.sort(axis=0)
+            x = x[cut : x.shape[0] - cut]
+        return x.mean(axis=0)
+
+    return _reduce_chunked(results, trimmed_mean, dtype=dtype, chunk_size=chunk_size)
+
+
+class RunningAggregate:
+    """Weighted average which absorbs client updates as they arrive.
+
+    The running weighted sum is kept in memory, or in an HDF5 file if `path` is
+    given, so that an interrupted round can be resumed. Each update is written with
+    the counts to a temporary file which then replaces `path`, so a crash never
+    leaves an update added to only some layers.
+
+    with RunningAggregate() as agg:
+        for file, num_examples in arrivals:
+            agg.add(file, num_examples)
+        agg.snapshot(store.file())
+    """
+
+    def __init__(self, dtype=None, path=None):
+        _check_floating(dtype)
+        self._dtype = dtype
+        self._lock = threading.Lock()
+        self._sums: Optional[list] = None
+        self._buffers: Optional[List[np.ndarray]] = None
+        self._path = path
+        self._file: Optional[h5py.File] = None
+        self._count = 0
+        self._num_examples_total = 0
+        if path is not None and os.path.exists(path):
+            self._open(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def _open(self, path):
+        self._file = h5py.File(path, "r")
+        attrs = self._file.attrs
+        self._count = int(attrs.get("count", 0))
+        self._num_examples_total = int(attrs.get("num_examples_total", 0))
+        if len(self._file):
+            self._sums = list(self._file.values())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def num_examples_total(self) -> int:
+        return self._num_examples_total
+
+    def _init_sums(self, weights: List[np.ndarray]):
+        dtypes = [_accumulator_dtype(layer, self._dtype) for layer in weights]
+        self._sums = [np.zeros(x.shape, dtype=t) for x, t in zip(weights, dtypes)]
+
+    def add(self, update, num_examples: int):
+        """Add weights, or a file saved by `save_weights`, weighted by num_examples."""
+        if isinstance(update, (str, Path)):
+            from .store import app
+
+            with app.load_with(update, sparse="coo") as weights:
+                weights = list(weights)
+        else:
+            weights = list(update)
+
+        with self._lock:
+            self._add(weights, num_examples)
+
+    def _add(self, weights: List[np.ndarray], num_examples: int):
+        if self._sums is None:
+            self._init_sums(weights)
+
+        sums: list = self._sums  # type: ignore
+        if len(weights) != len(sums):
+            raise ValueError("Number of layers does not match.")
+        for layer, acc in zip(weights, sums):
+            if layer.shape != acc.shape:
+                raise ValueError(f"Shape does not match: {layer.shape} {acc.shape}")
+
+        if self._buffers is None:
+            self._buffers = [np.empty(x.shape, dtype=x.dtype) for x in sums]
+
+        if self._path is not None:
+            self._commit(weights, num_examples)
+            return
+
+        for layer, acc, buf in zip(weights, sums, self._buffers):
+            _accumulate(acc, buf, layer, num_examples)
+        self._count += 1
+        self._num_examples_total += num_examples
+
+    def _commit(self, weights: List[np.ndarray], num_examples: int):
+        # the sums in `path` are not modified, so resuming never counts twice
+        tmp = atomic_temp_name(self._path)
+        try:
+            with h5py.File(tmp, "w", track_order=True) as f:
+                for i, (layer, acc, buf) in enumerate(
+                    zip(weights, self._sums, self._buffers)  # type: ignore
+                ):
+                    value = np.array(acc[()])
+                    _accumulate(value, buf, layer, num_examples)
+                    f.create_dataset(row_name(i), data=value)
+                f.attrs["count"] = self._count + 1
+                f.attrs["num_examples_total"] = self._num_examples_total + num_examples
+            commit_file(tmp, self._path, overwrite=True)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.close()
+        self._open(self._path)  # the counts are read from the committed file
+
+    def average(self) -> List[np.ndarray]:
+        with self._lock:
+            if self._sums is None or not self._num_examples_total:
+                raise ValueError("No update has been added.")
+            averages = [np.array(acc[()]) for acc in self._sums]
+            for x in averages:
+                np.divide(x, self._num_examples_total, out=x)
+            return averages
+
+    def snapshot(self, dest, *, meta=None, overwrite: bool = True):
+        """Save the current average with `save_weights`."""
+        from .store import app
+
+        meta = dict(meta or {})
+        meta.setdefault("num_examples", self._num_examples_total)
+        meta.setdefault("num_updates", self._count)
+        return app.save_weights(dest, self.average(), meta=meta, overwrite=overwrite)
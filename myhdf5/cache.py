@@ -0,0 +1,242 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .abc import ReIterable
+from .sparse import SparseLayer
+
+"""
+In-process cache of loaded models.
+
+cache = ModelCache(max_bytes=2 * 1024**3)
+with ModelStore("models", cache=cache) as store:
+    weights = store.load("a.hdf5")  # read from the file
+    weights = store.load("a.hdf5")  # shared with the first call
+    cache.stats()
+
+Entries are keyed by the path and the version of the file (inode, mtime, size),
+so a file replaced by `save(..., overwrite=True)` is never served from the cache.
+Cached arrays are read-only and shared by all callers. Containers (list, dict) are
+copied on each hit, so callers may modify them but not the arrays. DataFrames are
+copied on each hit. Other objects, e.g. unpickled ones, cannot be made read-only, so
+they are loaded on each call and not cached.
+"""
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+
+
+class _Entry(NamedTuple):
+    value: Any
+    nbytes: int
+
+
+def file_version(path) -> Tuple[int, int, int]:
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class ModelCache:
+    """LRU cache of loaded models bounded by the total bytes of their arrays.
+
+    Concurrent misses of the same key are coalesced into one load.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._loading: Dict[Hashable, Future] = {}
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, loader: Callable[[str], Any], options: Optional[dict] = None):
+        """Return the cached value of `path`, or load it by `loader(path)`."""
+        path = os.path.abspath(path)
+        key = (path, file_version(path))
+        if options:
+            try:
+                key += (frozenset(options.items()),)
+            except TypeError:
+                return materialize(loader(path))  # unhashable options
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return share(entry.value)
+
+            self._misses += 1
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+
+        if not owner:
+            value = future.result()
+            if value is _UNCACHED:
+                return materialize(loader(path))
+            return share(value)
+
+        try:
+            value = materialize(loader(path))
+        except BaseException as e:
+            future.set_exception(e)
+            with self._lock:
+                del self._loading[key]
+            raise
+
+        if not cacheable(value):
+            with self._lock:
+                del self._loading[key]
+            future.set_result(_UNCACHED)
+            return value
+
+        freeze(value)
+        with self._lock:
+            del self._loading[key]
+            self._put(key, value)
+        future.set_result(value)
+        return share(value)
+
+    def _put(self, key, value):
+        # entries of older versions are stale, so they are dropped as by `refresh`
+        # and not counted as evictions. other options of this version are kept
+        self._discard(lambda k: k[0] == key[0] and k[1] != key[1])
+        nbytes = sizeof(value)
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = _Entry(value, nbytes)
+        self._nbytes += nbytes
+        while self._nbytes > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._nbytes -= entry.nbytes
+            self._evictions += 1
+
+    def _discard(self, predicate) -> int:
+        keys = [k for k in self._entries if predicate(k)]
+        for k in keys:
+            self._nbytes -= self._entries.pop(k).nbytes
+        return len(keys)
+
+    def invalidate(self, path=None) -> int:
+        """Drop the entries of `path`, or all entries. Return the number dropped."""
+        with self._lock:
+            if path is None:
+                return self._discard(lambda k: True)
+            path = os.path.abspath(path)
+            return self._discard(lambda k: k[0] == path)
+
+    def refresh(self, path) -> int:
+        """Drop the entries of `path` other than its current version."""
+        path = os.path.abspath(path)
+        try:
+            current = file_version(path)
+        except FileNotFoundError:
+            current = None
+        with self._lock:
+            return self._discard(lambda k: k[0] == path and k[1] != current)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._entries),
+                self._nbytes,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"ModelCache(max_bytes={self.max_bytes}, {self.stats()})"
+
+
+def materialize(value):
+    """Read lazily loaded values, which are not available after the file is closed."""
+    if isinstance(value, ReIterable):
+        return [materialize(x) for x in value]
+    if isinstance(value, list):
+        return [materialize(x) for x in value]
+    if isinstance(value, Mapping):
+        return {k: materialize(v) for k, v in value.items()}
+    return value
+
+
+_UNCACHED = object()
+_SCALARS = (str, bytes, int, float, complex, type(None), np.generic)
+
+
+def _is_pandas(value) -> bool:
+    pd = sys.modules.get("pandas", None)
+    return pd is not None and isinstance(value, (pd.DataFrame, pd.Series))
+
+
+def cacheable(value) -> bool:
+    """Whether `value` is safe to share by callers after `freeze` and `share`."""
+    if isinstance(value, np.ndarray):
+        return not value.dtype.hasobject
+    if isinstance(value, (SparseLayer,) + _SCALARS) or _is_pandas(value):
+        return True
+    if isinstance(value, (list, dict)) or type(value) is tuple:
+        items = value.values() if isinstance(value, dict) else value
+        return all(cacheable(x) for x in items)
+    return False
+
+
+def freeze(value):
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, SparseLayer):
+        for x in (value.indices, value.values):
+            x.setflags(write=False)
+    elif isinstance(value, (list, tuple)):
+        for x in value:
+            freeze(x)
+    elif isinstance(value, dict):
+        for x in value.values():
+            freeze(x)
+    return value
+
+
+def share(value):
+    """Copy containers and DataFrames, not arrays."""
+    if isinstance(value, list):
+        return [share(x) for x in value]
+    if type(value) is tuple:
+        return tuple(share(x) for x in value)
+    if isinstance(value, dict):
+        return {k: share(v) for k, v in value.items()}
+    if _is_pandas(value):
+        return value.copy(deep=True)
+    return value
+
+
+def sizeof(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, SparseLayer):
+        return value.indices.nbytes + value.values.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(x) for x in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sizeof(k) + sizeof(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
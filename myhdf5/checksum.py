@@ -0,0 +1,137 @@
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List
+
+import h5py
+import numpy as np
+
+from .exceptions import ChecksumError
+
+"""
+Checksums are crc32 formatted as "crc32:xxxxxxxx".
+
+- datasets written by `WieghtsSerializer` have a `checksum` attr of their stored data.
+- the root group has a `checksum` attr over its attrs, the datasets and the
+  "value" attrs of every object.
+"""
+
+ATTR = "checksum"
+
+
+def _format(crc: int) -> str:
+    return "crc32:%08x" % (crc & 0xFFFFFFFF)
+
+
+def _to_bytes(value) -> bytes:
+    if isinstance(value, h5py.Empty):
+        return b""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    arr = np.asarray(value)
+    if arr.dtype.kind in "OUS":
+        return str(arr.tolist()).encode("utf-8")
+    return np.ascontiguousarray(arr).tobytes()
+
+
+def data_checksum(data) -> str:
+    if isinstance(data, np.ndarray) and data.dtype.kind not in "OUS":
+        return _format(zlib.crc32(np.ascontiguousarray(data).data))
+    return _format(zlib.crc32(_to_bytes(data)))
+
+
+def group_checksum(grp: h5py.Group) -> str:
+    """Checksum of a whole group. Datasets with a checksum attr are not reread."""
+    crc = 0
+
+    def feed(b: bytes):
+        nonlocal crc
+        crc = zlib.crc32(b, crc)
+
+    for key in sorted(grp.attrs):
+        if key != ATTR:
+            feed(key.encode("utf-8"))
+            feed(_to_bytes(grp.attrs[key]))
+
+    for name, obj in _objects(grp):
+        feed(name.encode("utf-8"))
+        if isinstance(obj, h5py.Dataset):
+            checksum = obj.attrs.get(ATTR, None)
+            if checksum is None:
+                checksum = data_checksum(obj[()])
+            feed(_to_bytes(checksum))
+        if "value" in obj.attrs:
+            feed(_to_bytes(obj.attrs["value"]))
+
+    return _format(crc)
+
+
+def _objects(grp: h5py.Group):
+    objects = []
+
+    def append(name, obj):
+        objects.append((name, obj))
+
+    grp.visititems(append)
+    return sorted(objects, key=lambda x: x[0])
+
+
+def write_checksum(grp: h5py.Group):
+    grp.attrs[ATTR] = group_checksum(grp)
+
+
+def verify_dataset(ds: h5py.Dataset, data=None):
+    """Raise ChecksumError if `data` (read from `ds`) does not match its checksum."""
+    expect = ds.attrs.get(ATTR, None)
+    if expect is None:
+        return
+    if data is None:
+        data = ds[()]
+    actual = data_checksum(data)
+    if actual != expect:
+        raise ChecksumError(f"{ds.name}: expected {expect}, got {actual}")
+
+
+def verify_group(grp: h5py.Group) -> List[str]:
+    """Return errors found in `grp`. A group written without checksum has none."""
+    errors = []
+    datasets = [obj for name, obj in _objects(grp) if isinstance(obj, h5py.Dataset)]
+    for ds in datasets:
+        try:
+            verify_dataset(ds)
+        except ChecksumError as e:
+            errors.append(str(e))
+
+    expect = grp.attrs.get(ATTR, None)
+    if expect is not None:
+        actual = group_checksum(grp)
+        if actual != expect:
+            errors.append(f"{grp.name}: expected {expect}, got {actual}")
+    return errors
+
+
+def verify_file(path) -> List[str]:
+    try:
+        with h5py.File(path, "r") as f:
+            return verify_group(f)
+    except Exception as e:
+        # e.g. truncated file
+        return [f"{type(e).__name__}: {e}"]
+
+
+def verify(paths: Iterable, workers: int = 0) -> Dict[str, List[str]]:
+    """Verify files and return errors of corrupted files by path.
+
+    With `workers`, files are verified in worker processes, which do not share
+    the h5py lock.
+    """
+    paths = [os.fspath(x) for x in paths]
+    if not workers:
+        results = map(verify_file, paths)
+        return {path: errors for path, errors in zip(paths, results) if errors}
+
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(verify_file, paths, chunksize=8)
+        return {path: errors for path, errors in zip(paths, results) if errors}
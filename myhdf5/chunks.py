@@ -0,0 +1,213 @@
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import h5py
+import numpy as np
+
+from .checksum import ATTR, data_checksum
+
+"""
+Layer-wise parallel compression with direct chunk I/O.
+
+Compressing, decompressing and checksumming (zlib releases the GIL) run on a thread
+pool, while every h5py call stays on the calling thread.
+The chunks are laid out along the first axis, so that each chunk is a contiguous
+block of rows of the layer.
+"""
+
+CHUNK_BYTES = 1024 * 1024
+
+
+def chunk_shape(shape: Tuple[int, ...], itemsize: int, target=CHUNK_BYTES):
+    row_bytes = int(np.prod(shape[1:], dtype=np.int64)) * itemsize
+    rows = max(1, min(shape[0], target // max(row_bytes, 1)))
+    return (rows,) + tuple(shape[1:])
+
+
+def is_chunkable(data: np.ndarray) -> bool:
+    return data.ndim > 0 and data.size > 0
+
+
+def _compress(block: np.ndarray, level: int) -> bytes:
+    return zlib.compress(np.ascontiguousarray(block).data, level)
+
+
+def _chunk_blocks(data: np.ndarray, chunks):
+    rows = chunks[0]
+    for start in range(0, data.shape[0], rows):
+        block = data[start : start + rows]
+        if block.shape[0] < rows:
+            # edge chunks are stored in full size
+            pad = np.zeros((rows - block.shape[0],) + block.shape[1:], block.dtype)
+            block = np.concatenate([block, pad])
+        yield (start,) + (0,) * (data.ndim - 1), block
+
+
+class _Job:
+    def __init__(self, grp, name, data: np.ndarray, attrs, chunks, futures, checksum):
+        self.grp = grp
+        self.name = name
+        self.data = data
+        self.attrs = attrs
+        self.chunks = chunks
+        self.futures: List[Tuple[tuple, Future]] = futures
+        self.checksum: Future = checksum
+
+
+def write_layers(
+    items: Iterable[Tuple[h5py.Group, str, np.ndarray, dict]],
+    compression: Optional[str] = None,
+    compression_opts: Optional[int] = None,
+    workers: int = 0,
+):
+    """Create a dataset per item `(group, name, data, attrs)`.
+
+    With `compression="gzip"` and `workers`, chunks are compressed in parallel and
+    written with `write_direct_chunk`. Otherwise h5py's filter pipeline is used.
+    The checksum of each dataset is computed from the data in memory.
+    """
+    if compression is not None and compression != "gzip" and workers:
+        raise ValueError("Parallel compression supports only gzip.")
+
+    if not workers or compression is None:
+        for grp, name, data, attrs in items:
+            kwargs = {}
+            if compression is not None and is_chunkable(data):
+                kwargs = dict(
+                    compression=compression, compression_opts=compression_opts
+                )
+            ds = grp.create_dataset(name, data=data, **kwargs)
+            ds.attrs.update(attrs)
+            ds.attrs[ATTR] = data_checksum(data)
+        return
+
+    level = 4 if compression_opts is None else compression_opts
+    with ThreadPoolExecutor(workers) as pool:
+        pending: deque = deque()
+        for grp, name, data, attrs in items:
+            # datasets are created in order, layers are read back by creation order
+            checksum = pool.submit(data_checksum, data)
+            if not is_chunkable(data):
+                pending.append(_Job(grp, name, data, attrs, None, [], checksum))
+                continue
+            chunks = chunk_shape(data.shape, data.dtype.itemsize)
+            futures = [
+                (offset, pool.submit(_compress, block, level))
+                for offset, block in _chunk_blocks(data, chunks)
+            ]
+            pending.append(_Job(grp, name, data, attrs, chunks, futures, checksum))
+            # bound memory held by compressed chunks waiting to be written
+            while len(pending) > workers:
+                _write_job(pending.popleft(), level)
+
+        while pending:
+            _write_job(pending.popleft(), level)
+
+
+def _write_job(job: _Job, level: int):
+    if job.chunks is None:
+        ds = job.grp.create_dataset(job.name, data=job.data)
+    else:
+        ds = job.grp.create_dataset(
+            job.name,
+            shape=job.data.shape,
+            dtype=job.data.dtype,
+            chunks=job.chunks,
+            compression="gzip",
+            compression_opts=level,
+        )
+        for offset, future in job.futures:
+            ds.id.write_direct_chunk(offset, future.result())
+    ds.attrs.update(job.attrs)
+    ds.attrs[ATTR] = job.checksum.result()
+
+
+def is_direct_readable(ds: h5py.Dataset) -> bool:
+    return bool(
+        ds.chunks
+        and ds.compression == "gzip"
+        and not ds.shuffle
+        and not ds.fletcher32
+        and ds.scaleoffset is None
+        and ds.chunks[1:] == ds.shape[1:]
+    )
+
+
+def _decompress(raw: Tuple[int, bytes]) -> bytes:
+    filter_mask, data = raw
+    if filter_mask & 1:
+        return data  # deflate was skipped for this chunk
+    return zlib.decompress(data)
+
+
+def read_dataset(ds: h5py.Dataset, pool: Optional[ThreadPoolExecutor] = None):
+    """Read a dataset, decompressing its chunks on `pool` when possible."""
+    if pool is None or not is_direct_readable(ds):
+        return np.asarray(ds[()])
+
+    rows = ds.chunks[0]
+    offsets = [(start,) + (0,) * (ds.ndim - 1) for start in range(0, ds.shape[0], rows)]
+    try:
+        raws = [ds.id.read_direct_chunk(offset) for offset in offsets]
+    except Exception:
+        return np.asarray(ds[()])  # e.g. chunks not allocated
+
+    out = np.empty(ds.shape, dtype=ds.dtype)
+    for offset, data in zip(offsets, pool.map(_decompress, raws)):
+        start = offset[0]
+        block = np.frombuffer(data, dtype=ds.dtype).reshape(ds.chunks)
+        stop = min(start + rows, ds.shape[0])
+        out[start:stop] = block[: stop - start]
+    return out
+
+
+def recompress_file(src, dest, compression: Optional[str], compression_opts=None):
+    """Copy an HDF5 file, changing the compression of its datasets.
+
+    compression: "gzip", "lzf" or None (uncompressed). Data is copied by blocks of
+    chunks, attrs and the creation order of links are kept.
+    """
+    with h5py.File(src, "r") as fsrc:
+        track_order = _track_order(fsrc)
+        with h5py.File(dest, "w-", track_order=track_order) as fdest:
+            _recompress_group(fsrc, fdest, compression, compression_opts)
+
+
+def _track_order(grp: h5py.Group) -> bool:
+    return bool(grp.id.get_create_plist().get_link_creation_order())
+
+
+def _recompress_group(src: h5py.Group, dest: h5py.Group, compression, opts):
+    dest.attrs.update(src.attrs)
+    for name in src:
+        obj = src[name]
+        if isinstance(obj, h5py.Group):
+            sub = dest.create_group(name, track_order=_track_order(obj))
+            _recompress_group(obj, sub, compression, opts)
+        elif obj.shape is None or not obj.ndim or not obj.size:
+            src.copy(obj, dest, name=name)  # nothing to compress
+        else:
+            _recompress_dataset(obj, dest, name, compression, opts)
+
+
+def _recompress_dataset(ds: h5py.Dataset, dest: h5py.Group, name, compression, opts):
+    chunks = ds.chunks or chunk_shape(ds.shape, ds.dtype.itemsize)
+    kwargs = {}
+    if compression is not None:
+        kwargs = dict(compression=compression, compression_opts=opts)
+    elif ds.maxshape == ds.shape:
+        chunks = None  # contiguous
+    out = dest.create_dataset(
+        name,
+        shape=ds.shape,
+        dtype=ds.dtype,
+        maxshape=ds.maxshape,
+        chunks=chunks,
+        **kwargs
+    )
+    out.attrs.update(ds.attrs)
+    rows = (chunks or chunk_shape(ds.shape, ds.dtype.itemsize))[0]
+    for start in range(0, ds.shape[0], rows):
+        out[start : start + rows] = ds[start : start + rows]
@@ -1,8 +1,12 @@
+import fnmatch
+import hashlib
+import json
 import os
+import shutil
 import tempfile
 import uuid
-from typing import Iterable
-import glob
+from collections import deque
+from typing import Iterable, Iterator, List, Optional
 
 
 """
@@ -45,24 +49,44 @@ class Dir:
         raise NotImplementedError()
 
     def ls(self, filter="*"):
-        path = os.path.join(self.dirname, "*")
-        return glob.glob(path)
+        return list(self.iter_ls(filter))
+
+    def iter_ls(self, filter="*") -> Iterator[str]:
+        with os.scandir(self.dirname) as it:
+            for entry in it:
+                if fnmatch.fnmatch(entry.name, filter) and not is_hidden(entry.name):
+                    yield entry.path
 
     def touch(self, suffix=""):
-        filename = self.next(suffix)
-        with open(filename, "w") as f:
-            ...
-        return filename
+        while True:
+            filename = self.next(suffix)
+            try:
+                fd = os.open(filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            os.close(fd)
+            return filename
 
 
 class InfinityTempNames(Dir):
-    def __init__(self):
-        self._published: set
+    """Publish unique file names in a temporary directory.
+
+    Names rely on the uniqueness of uuid4, so no file system access is needed.
+    Published names are kept for `names` up to `max_published`
+    (None: unlimited, 0: not kept).
+    Use `touch` when a name must be reserved atomically on the file system.
+    """
+
+    _max_published: Optional[int] = None
+
+    def __init__(self, max_published: Optional[int] = None):
+        self._published: deque
         self._tmpdir: str
         self._dirname: str
+        self._max_published = max_published
 
     def __enter__(self):
-        self._published = set()
+        self._published = deque(maxlen=self._max_published)
         self._tmpdir = tempfile.TemporaryDirectory()
         self._dirname = self._tmpdir.__enter__()
         return self
@@ -75,13 +99,9 @@ class InfinityTempNames(Dir):
         del self._dirname
 
     def __next__(self, suffix="") -> str:
-        suffix = suffix or ""
-        while True:
-            filename = self._dirname + "/" + str(uuid.uuid4()) + suffix
-            if (not os.path.exists(filename)) and filename not in self._published:
-                break
-
-        self._published.add(filename)
+        filename = unique_name(self._dirname, suffix=suffix or "")
+        if self._max_published != 0:
+            self._published.append(filename)
         return filename
 
     def __iter__(self):
@@ -91,13 +111,22 @@ class InfinityTempNames(Dir):
     def next(self, suffix=""):
         return self.__next__(suffix)
 
+    def reserve(self, n: int, suffix="") -> List[str]:
+        """Publish `n` names at once."""
+        suffix = suffix or ""
+        dirname = self._dirname
+        filenames = [unique_name(dirname, suffix=suffix) for i in range(n)]
+        if self._max_published != 0:
+            self._published.extend(filenames)
+        return filenames
+
     @property
     def dirname(self):
         return self._dirname
 
     @property
     def names(self):
-        return self._published.__iter__()
+        return list(self._published)  # a snapshot, `next` may be called meanwhile
 
 
 class RealDir(InfinityTempNames):
@@ -113,7 +142,7 @@ class RealDir(InfinityTempNames):
 
     def __enter__(self):
         self._dirname = self._tmpdirname
-        self._published = set()
+        self._published = deque(maxlen=self._max_published)
 
         if not os.path.exists(self._dirname):
             os.mkdir(self._dirname)
@@ -123,3 +152,241 @@ class RealDir(InfinityTempNames):
     def __exit__(self, *args, **kwargs):
         del self._published
         del self._dirname
+
+
+DEFAULT_MAX_PUBLISHED = 1024  # names kept by temporary stores and files
+
+
+def unique_name(dirname, suffix="", prefix="") -> str:
+    return dirname + "/" + prefix + str(uuid.uuid4()) + suffix
+
+
+def atomic_temp_name(path) -> str:
+    # hidden sibling of the destination, so `os.replace` never crosses filesystems
+    dirname = os.path.dirname(os.path.abspath(path))
+    return unique_name(dirname, suffix=".tmp", prefix=".")
+
+
+def fsync_file(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(dirname):
+    try:
+        fd = os.open(dirname, os.O_RDONLY)
+    except OSError:
+        return  # e.g. windows can not open directories
+    try:
+        os.fsync(fd)
+    except OSError:
+        ...
+    finally:
+        os.close(fd)
+
+
+class FsyncBatch:
+    """Defer fsync of committed files and flush them together.
+
+    Files are renamed into place immediately, so a crash before `flush` may leave
+    recently written entries empty or missing, but never half-written.
+
+    with FsyncBatch() as batch:
+        for i, weights in enumerate(rounds):
+            store.save_weights(f"{i}.hdf5", weights, fsync=batch)
+    """
+
+    def __init__(self, max_pending: int = 0):
+        self.max_pending = max_pending
+        self._files: list = []
+        self._dirs: set = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.flush()
+
+    def add(self, path):
+        self._files.append(path)
+        self._dirs.add(os.path.dirname(os.path.abspath(path)))
+        if self.max_pending and len(self._files) >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        files, self._files = self._files, []
+        dirs, self._dirs = self._dirs, set()
+        for path in files:
+            try:
+                fsync_file(path)
+            except FileNotFoundError:
+                ...
+        for dirname in dirs:
+            fsync_dir(dirname)
+
+
+def commit_file(tmp, dest, *, overwrite: bool = False, fsync=True):
+    """Move a completely written temporary file to `dest` atomically."""
+    if fsync is True:
+        fsync_file(tmp)
+
+    if overwrite:
+        os.replace(tmp, dest)
+    else:
+        try:
+            os.link(tmp, dest)
+        except FileExistsError:
+            raise
+        except OSError:
+            # filesystems without hard links
+            if os.path.exists(dest):
+                raise FileExistsError(dest)
+            os.replace(tmp, dest)
+        else:
+            os.unlink(tmp)
+
+    if fsync is True:
+        fsync_dir(os.path.dirname(os.path.abspath(dest)))
+    elif fsync:
+        fsync.add(dest)
+
+
+def copy_file(src, dest):
+    """Copy the content of `src` to a new file `dest`.
+
+    `os.copy_file_range` lets the kernel copy without reading into user space, or
+    share the extents (reflink) on filesystems supporting it.
+    """
+    with open(src, "rb") as fsrc, open(dest, "xb") as fdest:
+        copy_file_range = getattr(os, "copy_file_range", None)
+        if copy_file_range is not None:
+            try:
+                size = os.fstat(fsrc.fileno()).st_size
+                copied = 0
+                while copied < size:
+                    n = copy_file_range(fsrc.fileno(), fdest.fileno(), size - copied)
+                    if n == 0:
+                        break
+                    copied += n
+                if copied == size:
+                    return
+            except OSError:
+                ...  # e.g. across filesystems on old kernels
+            fsrc.seek(0)
+            fdest.seek(0)
+            fdest.truncate()
+        shutil.copyfileobj(fsrc, fdest, 1024 * 1024)
+
+
+def link_file(src, dest):
+    """Hard link `src` to `dest`, or copy it on filesystems without hard links."""
+    try:
+        os.link(src, dest)
+    except (FileExistsError, FileNotFoundError):
+        raise
+    except OSError:
+        copy_file(src, dest)
+
+
+def is_hidden(name: str) -> bool:
+    return name.startswith(".")
+
+
+def shard_path(name: str, depth: int, width: int = 2) -> str:
+    """Return `name` prefixed with hashed fan-out directories. e.g. ab/cd/name"""
+    if depth <= 0:
+        return name
+    digest = hashlib.md5(name.encode("utf-8")).hexdigest()
+    if depth * width > len(digest):
+        raise ValueError(f"depth is too large: {depth}")
+    parts = [digest[i * width : (i + 1) * width] for i in range(depth)]
+    return os.path.join(*parts, name)
+
+
+def unshard_path(relpath: str, depth: int) -> str:
+    if depth <= 0:
+        return relpath
+    parts = relpath.split(os.sep)
+    return os.path.join(*parts[depth:])
+
+
+def scan_entries(dirname, depth: int = 0) -> Iterator[os.DirEntry]:
+    """Stream file entries under `dirname`, descending `depth` shard levels.
+
+    Hidden entries (e.g. temporary files of atomic writes) are skipped.
+    """
+    with os.scandir(dirname) as it:
+        for entry in it:
+            if is_hidden(entry.name):
+                continue
+            if depth > 0:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from scan_entries(entry.path, depth - 1)
+            elif entry.is_file():
+                yield entry
+
+
+LAYOUT = ".layout"
+
+
+def read_layout(dirname) -> Optional[dict]:
+    """Return the layout saved by `write_layout`, or None."""
+    try:
+        with open(os.path.join(dirname, LAYOUT), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_layout(dirname, depth: int, width: int = 2):
+    tmp = atomic_temp_name(os.path.join(dirname, LAYOUT))
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"shard_depth": depth, "width": width}, f)
+    commit_file(tmp, os.path.join(dirname, LAYOUT), overwrite=True)
+
+
+def _nested_dirs(dirname, depth: int) -> Iterator[str]:
+    # directories where files are expected. scan_entries does not descend them
+    with os.scandir(dirname) as it:
+        for entry in it:
+            if is_hidden(entry.name) or not entry.is_dir(follow_symlinks=False):
+                continue
+            if depth > 0:
+                yield from _nested_dirs(entry.path, depth - 1)
+            else:
+                yield entry.path
+
+
+def reshard(dirname, depth: int, current_depth: int = 0, width: int = 2) -> int:
+    """Move files of a store laid out with `current_depth` to `depth`.
+
+    Return the number of moved files. Emptied shard directories are removed, and
+    the new layout is saved by `write_layout`.
+    Raise ValueError if entries are in sub directories, which can not be sharded.
+    """
+    if depth != current_depth:
+        nested = sorted(_nested_dirs(dirname, current_depth))
+        if nested:
+            raise ValueError(f"Sub directories can not be resharded: {nested}")
+
+    moved = 0
+    for entry in list(scan_entries(dirname, current_depth)):
+        relpath = os.path.relpath(entry.path, dirname)
+        name = unshard_path(relpath, current_depth)
+        dest = os.path.join(dirname, shard_path(name, depth, width=width))
+        if dest == entry.path:
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(entry.path, dest)
+        moved += 1
+
+    if current_depth > 0:
+        for root, dirs, files in os.walk(dirname, topdown=False):
+            if root != dirname and not os.listdir(root):
+                os.rmdir(root)
+
+    write_layout(dirname, depth, width=width)
+    return moved
@@ -4,3 +4,7 @@ class SerializeError(Exception):
 
 class FileAlreadyClosedError(Exception):
     ...
+
+
+class ChecksumError(SerializeError):
+    ...
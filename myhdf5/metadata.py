@@ -0,0 +1,220 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import h5py
+import numpy as np
+
+from .directory import atomic_temp_name, commit_file
+
+"""
+Export the attrs of store entries as a table, one row per file.
+
+store.export_metadata("meta.parquet")  # requires pyarrow: pip install h5pyex[parquet]
+store.export_metadata("meta.npz", format="npz", incremental=True)
+
+Columns are key, path, size, mtime_ns, appname, serializer, created_at, updated_at
+and "meta.<field>" for each field of meta. Nested dicts are flattened with "." and
+other containers are stored as json.
+In npz, missing values are filled with 0, NaN, False or "", and a column with
+missing values has a bool column "missing.<column>" which is True where missing.
+With `incremental`, rows of files whose size and mtime are unchanged since the
+previous export at the same path are reused, and only the other files are opened.
+"""
+
+FORMATS = ("parquet", "npz")
+MISSING = "missing."
+ATTRS = {
+    "appname": "appname",
+    "name": "serializer",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+
+
+def flatten(meta: dict, prefix: str = "meta.") -> dict:
+    out = {}
+    for k, v in meta.items():
+        if isinstance(v, dict) and v:
+            out.update(flatten(v, prefix + str(k) + "."))
+        elif isinstance(v, (list, tuple, dict)):
+            out[prefix + str(k)] = json.dumps(v, ensure_ascii=False)
+        else:
+            out[prefix + str(k)] = v
+    return out
+
+
+def read_record(path) -> Optional[dict]:
+    """Read a row of `path`. The file is opened once. None if it was removed."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    record = {"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    try:
+        with h5py.File(path, "r") as f:
+            attrs = {k: f.attrs[k] for k in list(ATTRS) + ["meta"] if k in f.attrs}
+    except OSError:
+        return record  # not an hdf5 file
+    for k, column in ATTRS.items():
+        if k in attrs:
+            record[column] = str(attrs[k])
+    if "meta" in attrs:
+        record.update(flatten(json.loads(attrs["meta"])))
+    return record
+
+
+def collect(paths: Iterable[str], workers: int = 0) -> List[dict]:
+    """Read rows of `paths`. With `workers`, files are read in worker processes."""
+    paths = list(paths)
+    if not workers:
+        records = [read_record(x) for x in paths]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            records = list(pool.map(read_record, paths, chunksize=32))
+    return [x for x in records if x is not None]
+
+
+def _column(values: list) -> Tuple[str, list]:
+    """Return the kind of a column and its values, converted if types are mixed."""
+    kinds = {type(x) for x in values if x is not None}
+    if kinds == {bool}:
+        return "bool", values
+    if kinds and kinds <= {int}:
+        return "int", values
+    if kinds and kinds <= {int, float}:
+        return "float", values
+    if kinds <= {str}:
+        return "str", values
+    return "str", [None if x is None else json.dumps(x) for x in values]
+
+
+def to_columns(records: List[dict]) -> Dict[str, Tuple[str, list]]:
+    names: Dict[str, None] = {}
+    for record in records:
+        names.update(dict.fromkeys(record))
+    return {name: _column([x.get(name) for x in records]) for name in names}
+
+
+FILLS = {"int": 0, "float": np.nan, "bool": False, "str": ""}
+DTYPES = {"int": np.int64, "float": np.float64, "bool": bool, "str": str}
+
+
+def _to_numpy(kind: str, values: list) -> np.ndarray:
+    fill = FILLS[kind]
+    return np.array([fill if x is None else x for x in values], dtype=DTYPES[kind])
+
+
+def write_npz(records: List[dict], dest):
+    columns = {}
+    for k, (kind, values) in to_columns(records).items():
+        columns[k] = _to_numpy(kind, values)
+        missing = np.array([x is None for x in values], dtype=bool)
+        if missing.any():
+            columns[MISSING + k] = missing
+    with open(dest, "wb") as f:
+        np.savez(f, **columns)
+
+
+def read_npz(src) -> List[dict]:
+    with np.load(src, allow_pickle=False) as npz:
+        columns = {k: npz[k].tolist() for k in npz.files if not k.startswith(MISSING)}
+        masks = {k: npz[MISSING + k] for k in columns if MISSING + k in npz.files}
+    n = len(next(iter(columns.values()), []))
+    records = []
+    for i in range(n):
+        record = {}
+        for k, values in columns.items():
+            if k in masks and masks[k][i]:
+                continue
+            record[k] = values[i]
+        records.append(record)
+    return records
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            'format="parquet" requires pyarrow. Install it by '
+            '`pip install h5pyex[parquet]`, or use format="npz".'
+        ) from e
+    return pa, pq
+
+
+def write_parquet(records: List[dict], dest):
+    pa, pq = _import_pyarrow()
+    columns = {k: values for k, (kind, values) in to_columns(records).items()}
+    pq.write_table(pa.table(columns), dest)
+
+
+def read_parquet(src) -> List[dict]:
+    _, pq = _import_pyarrow()
+    rows = pq.read_table(src).to_pylist()
+    return [{k: v for k, v in row.items() if v is not None} for row in rows]
+
+
+def export_metadata(
+    paths: Iterable[str],
+    dest,
+    format: str = "parquet",
+    workers: int = 0,
+    incremental: bool = False,
+    keys: Optional[Dict[str, str]] = None,
+) -> int:
+    """Write rows of `paths` to `dest`. Return the number of files read.
+
+    keys: the value of the "key" column by path.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format: {format}")
+    if format == "parquet":
+        _import_pyarrow()  # before files are read
+
+    paths = list(paths)
+    previous: Dict[str, dict] = {}
+    if incremental and os.path.exists(dest):
+        read = read_parquet if format == "parquet" else read_npz
+        previous = {x["path"]: x for x in read(dest) if "path" in x}
+
+    stale = []
+    for path in paths:
+        prev = previous.pop(path, None)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if prev is None or (prev.get("size"), prev.get("mtime_ns")) != (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            stale.append(path)
+        else:
+            previous[path] = prev
+
+    # rows of removed files are dropped
+    fresh = {x["path"]: x for x in collect(stale, workers=workers)}
+    records = []
+    for path in paths:
+        record = fresh.get(path, previous.get(path, None))
+        if record is None:
+            continue
+        if keys is not None:
+            # a reused row has the key of the previous export
+            record = {**record, "key": keys.get(path, None)}
+        records.append(record)
+
+    tmp = atomic_temp_name(dest)
+    try:
+        if format == "parquet":
+            write_parquet(records, tmp)
+        else:
+            write_npz(records, tmp)
+        commit_file(tmp, dest, overwrite=True)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return len(stale)
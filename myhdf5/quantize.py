@@ -0,0 +1,117 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+"""
+Lossy encodings of weights layers. The parameters needed to decode are kept
+in the attrs of the dataset.
+
+data, attrs = quantize_layer(layer, "int8", channel_axis=-1)
+layer = dequantize_layer(data, attrs)
+"""
+
+ENCODINGS = ("float16", "bfloat16", "int8")
+
+
+def quantize_layer(
+    layer: np.ndarray, encoding: str, channel_axis: Optional[int] = None
+) -> Tuple[np.ndarray, dict]:
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+
+    attrs = {"encoding": encoding, "dtype": layer.dtype.str}
+    if encoding == "float16":
+        return layer.astype(np.float16), attrs
+    elif encoding == "bfloat16":
+        return float32_to_bfloat16(layer), attrs
+    else:
+        if layer.ndim < 2:
+            channel_axis = None
+        data, scale, zero_point = quantize_int8(layer, channel_axis)
+        attrs["scale"] = scale
+        attrs["zero_point"] = zero_point
+        if channel_axis is not None:
+            attrs["channel_axis"] = channel_axis % layer.ndim
+        return data, attrs
+
+
+def dequantize_layer(data: np.ndarray, attrs) -> np.ndarray:
+    encoding = attrs["encoding"]
+    dtype = np.dtype(attrs["dtype"])
+    if encoding == "float16":
+        return data.astype(dtype)
+    elif encoding == "bfloat16":
+        return bfloat16_to_float32(data).astype(dtype, copy=False)
+    elif encoding == "int8":
+        channel_axis = attrs.get("channel_axis", None)
+        return dequantize_int8(
+            data, attrs["scale"], attrs["zero_point"], channel_axis, dtype
+        )
+    else:
+        raise ValueError(f"Unknown encoding: {encoding}")
+
+
+def is_quantizable(layer: np.ndarray) -> bool:
+    return np.issubdtype(layer.dtype, np.floating) and layer.size > 0
+
+
+def float32_to_bfloat16(x: np.ndarray) -> np.ndarray:
+    """Round to nearest even and keep the upper 16 bits as uint16."""
+    x = np.asarray(x, dtype=np.float32)
+    bits = x.reshape(-1).view(np.uint32)
+    rounding = ((bits >> 16) & 1) + np.uint32(0x7FFF)
+    out = ((bits + rounding) >> 16).astype(np.uint16)
+    out[np.isnan(x.reshape(-1))] = 0x7FC0
+    return out.reshape(x.shape)
+
+
+def bfloat16_to_float32(x: np.ndarray) -> np.ndarray:
+    bits = np.asarray(x).reshape(-1).astype(np.uint32)
+    return (bits << 16).view(np.float32).reshape(np.shape(x))
+
+
+def _reduce_axes(ndim: int, channel_axis: Optional[int]):
+    if channel_axis is None:
+        return None
+    return tuple(i for i in range(ndim) if i != channel_axis % ndim)
+
+
+def quantize_int8(
+    x: np.ndarray, channel_axis: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Affine quantization to int8. `channel_axis` gives a scale per channel."""
+    shape = x.shape
+    x = np.atleast_1d(x)
+    axes = _reduce_axes(x.ndim, channel_axis)
+    low = np.minimum(np.min(x, axis=axes, keepdims=True), 0).astype(np.float64)
+    high = np.maximum(np.max(x, axis=axes, keepdims=True), 0).astype(np.float64)
+    scale = ((high - low) / 255).astype(np.float32)
+    scale[scale == 0] = 1.0
+    zero_point = np.round(-128 - low / scale).astype(np.float32)
+
+    q = np.empty(x.shape, dtype=np.float64)
+    np.divide(x, scale, out=q)
+    np.add(q, zero_point, out=q)
+    np.round(q, out=q)
+    np.clip(q, -128, 127, out=q)
+    q = q.astype(np.int8).reshape(shape)
+    return q, scale.reshape(-1), zero_point.reshape(-1)
+
+
+def dequantize_int8(
+    q: np.ndarray, scale, zero_point, channel_axis=None, dtype=np.float32
+) -> np.ndarray:
+    scale = np.asarray(scale, dtype=dtype)
+    zero_point = np.asarray(zero_point, dtype=dtype)
+    if channel_axis is None:
+        scale = scale.reshape(())
+        zero_point = zero_point.reshape(())
+    else:
+        shape = [1] * q.ndim
+        shape[channel_axis] = -1
+        scale = scale.reshape(shape)
+        zero_point = zero_point.reshape(shape)
+    out = np.array(q, dtype=dtype)
+    np.subtract(out, zero_point, out=out)
+    np.multiply(out, scale, out=out)
+    return out
@@ -0,0 +1,297 @@
+import json
+import os
+import threading
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+"""
+retention = [KeepLastN(3, key="client"), TTL(3600 * 24)]
+with ModelStore("models", retention=retention) as store:
+    store.save_weights("round_1.hdf5", weights, meta={"client": "a"})  # sweep on save
+    report = store.sweep(dry_run=True)
+
+# or sweep from a background thread
+with RetentionSweeper(store, interval=60):
+    ...
+"""
+
+
+class Entry:
+    __slots__ = ("path", "size", "mtime", "atime", "hits", "_meta", "_load_meta")
+
+    def __init__(self, path, size, mtime, atime, load_meta: Callable):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.atime = atime
+        self.hits = 0
+        self._meta = None
+        self._load_meta = load_meta
+
+    @property
+    def meta(self) -> dict:
+        # read only when a policy needs it, then cached
+        if self._meta is None:
+            try:
+                self._meta = self._load_meta(self.path)
+            except Exception:
+                self._meta = {}
+        return self._meta
+
+
+class StoreIndex:
+    """In-memory index of store entries.
+
+    Built by one directory scan on first use and updated incrementally afterwards.
+    Loads before the scan are kept and merged into it, because `st_atime` is not
+    updated on every read under relatime or noatime.
+    """
+
+    def __init__(self, iter_entries: Callable[[], Iterable[os.DirEntry]], load_meta):
+        self._iter_entries = iter_entries
+        self._load_meta = load_meta
+        self._entries: Optional[Dict[str, Entry]] = None
+        self._pending: Dict[str, Tuple[int, float]] = {}  # path: (hits, atime)
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._entries is not None
+
+    def entries(self) -> List[Entry]:
+        with self._lock:
+            if self._entries is None:
+                self.rescan()
+            return list(self._entries.values())  # type: ignore
+
+    def rescan(self):
+        with self._lock:
+            old = self._entries or {}
+            entries = {}
+            for x in self._iter_entries():
+                try:
+                    stat = x.stat()
+                except FileNotFoundError:
+                    continue
+                entry = self._new_entry(x.path, stat)
+                prev = old.get(x.path)
+                if prev is not None:
+                    entry.hits = prev.hits
+                    entry.atime = max(prev.atime, entry.atime)
+                    if prev.mtime == entry.mtime:
+                        entry._meta = prev._meta
+                pending = self._pending.pop(x.path, None)
+                if pending is not None:
+                    entry.hits += pending[0]
+                    entry.atime = max(pending[1], entry.atime)
+                entries[x.path] = entry
+            self._entries = entries
+            self._pending.clear()
+
+    def _new_entry(self, path, stat) -> Entry:
+        return Entry(path, stat.st_size, stat.st_mtime, stat.st_atime, self._load_meta)
+
+    def update(self, path, meta=None):
+        """Reflect a created or updated file. Nothing to do until the index is built."""
+        with self._lock:
+            if self._entries is None:
+                return
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self._entries.pop(path, None)
+                return
+            entry = self._new_entry(path, stat)
+            prev = self._entries.get(path)
+            if prev is not None:
+                entry.hits = prev.hits
+            entry._meta = meta
+            self._entries[path] = entry
+
+    def touch(self, path):
+        with self._lock:
+            if self._entries is None:
+                hits, _ = self._pending.get(path, (0, 0.0))
+                self._pending[path] = (hits + 1, time.time())
+                return
+            entry = self._entries.get(path)
+            if entry is not None:
+                entry.hits += 1
+                entry.atime = time.time()
+
+    def discard(self, path):
+        with self._lock:
+            self._pending.pop(path, None)
+            if self._entries is not None:
+                self._entries.pop(path, None)
+
+
+class Eviction(NamedTuple):
+    path: str
+    size: int
+    reason: str
+
+
+class SweepReport:
+    def __init__(self, evicted: List[Eviction], dry_run: bool):
+        self.evicted = evicted
+        self.dry_run = dry_run
+
+    @property
+    def paths(self) -> List[str]:
+        return [x.path for x in self.evicted]
+
+    @property
+    def freed_bytes(self) -> int:
+        return sum(x.size for x in self.evicted)
+
+    def __repr__(self):
+        return (
+            f"SweepReport(evicted={len(self.evicted)}, "
+            f"freed_bytes={self.freed_bytes}, dry_run={self.dry_run})"
+        )
+
+
+class RetentionPolicy:
+    def select(self, entries: List[Entry], now: float) -> Iterator[Eviction]:
+        raise NotImplementedError()
+
+
+class KeepLastN(RetentionPolicy):
+    """Keep the newest `n` entries, per value of `meta[key]` if key is given."""
+
+    def __init__(self, n: int, key: Optional[str] = None):
+        if n < 0:
+            raise ValueError("n must be positive.")
+        self.n = n
+        self.key = key
+
+    def _group(self, entry: Entry):
+        if self.key is None:
+            return None
+        value = entry.meta.get(self.key, _MISSING)
+        if value is _MISSING:
+            return _MISSING
+        return json.dumps(value, sort_keys=True)
+
+    def select(self, entries, now):
+        groups: Dict[object, List[Entry]] = {}
+        for entry in entries:
+            groups.setdefault(self._group(entry), []).append(entry)
+
+        groups.pop(_MISSING, None)
+        for group in groups.values():
+            group.sort(key=lambda x: x.mtime, reverse=True)
+            for entry in group[self.n :]:
+                yield Eviction(entry.path, entry.size, f"keep last {self.n}")
+
+
+class MaxTotalBytes(RetentionPolicy):
+    """Evict entries until the total size fits `max_bytes`. by: "lru" or "lfu"."""
+
+    def __init__(self, max_bytes: int, by: str = "lru"):
+        if by not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction order: {by}")
+        self.max_bytes = max_bytes
+        self.by = by
+
+    def select(self, entries, now):
+        total = sum(x.size for x in entries)
+        if total <= self.max_bytes:
+            return
+
+        if self.by == "lru":
+            order = sorted(entries, key=lambda x: x.atime)
+        else:
+            order = sorted(entries, key=lambda x: (x.hits, x.atime))
+
+        for entry in order:
+            if total <= self.max_bytes:
+                break
+            total -= entry.size
+            yield Eviction(entry.path, entry.size, f"max total bytes ({self.by})")
+
+
+class TTL(RetentionPolicy):
+    """Evict entries not updated for `seconds`."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def select(self, entries, now):
+        for entry in entries:
+            if now - entry.mtime > self.seconds:
+                yield Eviction(entry.path, entry.size, f"ttl {self.seconds}s")
+
+
+def sweep(
+    index: StoreIndex, policies: Iterable[RetentionPolicy], dry_run: bool = False
+) -> SweepReport:
+    """Apply policies in order. Later policies see only the remaining entries."""
+    now = time.time()
+    remaining = index.entries()
+    evicted: List[Eviction] = []
+    for policy in policies:
+        victims = {x.path: x for x in policy.select(remaining, now)}
+        remaining = [x for x in remaining if x.path not in victims]
+        evicted.extend(victims.values())
+
+    if not dry_run:
+        for x in evicted:
+            try:
+                os.remove(x.path)
+            except FileNotFoundError:
+                ...
+            index.discard(x.path)
+
+    return SweepReport(evicted, dry_run=dry_run)
+
+
+class RetentionSweeper:
+    """Run `store.sweep()` periodically on a background thread."""
+
+    def __init__(self, store, interval: float = 60.0, rescan: bool = False):
+        self._store = store
+        self.interval = interval
+        self.rescan = rescan
+        self.last_report: Optional[SweepReport] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.stop()
+
+    def start(self):
+        if self._thread is not None:
+            raise RuntimeError("Already started.")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.rescan:
+                self._store.index.rescan()
+            self.last_report = self._store.sweep()
+
+
+_MISSING = object()
@@ -8,16 +8,27 @@ from typing import TYPE_CHECKING, Set, Type
 import h5py
 from genericpath import isdir
 
-from .abc import BaseSerializer, extensionmethod
+from .abc import BaseSerializer, ReIterable, extensionmethod
 from .appname import APPNAME
-from .directory import InfinityTempNames, RealDir
+from .checksum import verify_group, write_checksum
+from .directory import InfinityTempNames, RealDir, atomic_temp_name, commit_file
+from .exceptions import ChecksumError
 from .serializers import (
     ByteSerializer,
+    ByteStreamSerializer,
+    CheckpointsSerializer,
     Hdf5Serializer,
     JsonSerializer,
     NdarraySerializer,
     WieghtsSerializer,
 )
+from .swmr import SwmrReader, SwmrWriter
+from .writer import StreamWriter
+
+appendable_serializers = {
+    "weights": CheckpointsSerializer,
+    "bytes": ByteStreamSerializer,
+}
 
 
 class Serializer:
@@ -61,8 +72,18 @@ class Serializer:
 
         return None
 
+    @classmethod
+    def _save(cls, dest, obj, serializer, meta=None, options=None, checksum=True):
+        cls._write_attrs(dest, serializer, meta)
+        if options:
+            serializer.serialize(dest, obj, **options)
+        else:
+            serializer.serialize(dest, obj)
+        if checksum:
+            write_checksum(dest)
+
     @staticmethod
-    def _save(dest, obj, serializer, meta=None):
+    def _write_attrs(dest, serializer, meta=None):
         if meta is None:
             meta = {}
         if not isinstance(meta, dict):
@@ -74,51 +95,106 @@ class Serializer:
             dest.attrs["created_at"] = updated_at
         dest.attrs["updated_at"] = updated_at
         dest.attrs["meta"] = json.dumps(meta)
-        serializer.serialize(dest, obj)
 
-    def save(self, dest, obj, *, meta=None, serializer=None, overwrite: bool = False):
+    def save(
+        self,
+        dest,
+        obj,
+        *,
+        meta=None,
+        serializer=None,
+        overwrite: bool = False,
+        fsync=True,
+        **options,
+    ):
+        """Save obj. `options` are passed to `serializer.serialize`."""
         if serializer is None:
             serializer = self.get_serializer_by_value(obj)
         if serializer is None:
             raise Exception()
 
-        mode = "w" if overwrite else "w-"
-
-        try:
-            from_path, _dest = self._is_valid_dest(
-                dest, mode, track_order=serializer.track_order
-            )
-        except FileExistsError as e:
-            raise FileExistsError(
-                "File already exists. If you want to overwrite, set `overwrite=True`"
+        if isinstance(dest, (str, Path)):
+            self._save_atomic(
+                dest,
+                obj,
+                serializer,
+                meta=meta,
+                overwrite=overwrite,
+                fsync=fsync,
+                options=options,
             )
+            return dest
+
+        mode = "w" if overwrite else "w-"
+        from_path, _dest = self._is_valid_dest(
+            dest, mode, track_order=serializer.track_order
+        )
 
         if not is_empty_group(_dest):
             raise Exception()
 
-        if from_path:
-            with _dest as _dest:
-                self._save(_dest, obj, serializer, meta=meta)
-        else:
-            self._save(_dest, obj, serializer, meta=meta)
-
+        self._save(_dest, obj, serializer, meta=meta, options=options)
         return dest
 
+    def _save_atomic(
+        self, dest, obj, serializer, *, meta, overwrite, fsync, options=None
+    ):
+        # write a hidden sibling file and move it into place, so readers only ever
+        # observe the previous or the new content.
+        if not overwrite and os.path.exists(dest):
+            raise FileExistsError(
+                "File already exists. If you want to overwrite, set `overwrite=True`"
+            )
+
+        tmp = atomic_temp_name(dest)
+        try:
+            with h5py.File(tmp, "w-", track_order=serializer.track_order) as _dest:
+                self._save(_dest, obj, serializer, meta=meta, options=options)
+            commit_file(tmp, dest, overwrite=overwrite, fsync=fsync)
+        except FileExistsError:
+            raise FileExistsError(
+                "File already exists. If you want to overwrite, set `overwrite=True`"
+            )
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
     def save_file(
-        self, dest, file_path, mode="rb", *, meta=None, overwrite: bool = False
+        self,
+        dest,
+        file_path,
+        mode="rb",
+        *,
+        meta=None,
+        overwrite: bool = False,
+        fsync=True,
     ):
         if not isinstance(file_path, (str, Path)):
             raise Exception()
 
         with open(file_path, mode) as f:
-            return self.save(dest, f, meta=meta, overwrite=overwrite)
+            return self.save(dest, f, meta=meta, overwrite=overwrite, fsync=fsync)
 
-    def save_weights(self, dest, obj, *, meta=None, overwrite: bool = False):
+    def save_weights(
+        self, dest, obj, *, meta=None, overwrite: bool = False, fsync=True, **options
+    ):
         return self.save(
-            dest, obj, serializer=WieghtsSerializer, meta=meta, overwrite=overwrite
+            dest,
+            obj,
+            serializer=WieghtsSerializer,
+            meta=meta,
+            overwrite=overwrite,
+            fsync=fsync,
+            **options,
         )
 
-    def load(self, src, map=None):
+    def load(self, src, map=None, prefetch: int = 0, verify: bool = False, **options):
+        """Load obj. `options` are passed to `serializer.deserialize`.
+
+        prefetch: read up to `prefetch` layers or chunks ahead on a background thread
+        verify: raise ChecksumError on corrupted data. Weights are checked while
+            streaming, other serializers are checked before loading.
+        """
         from_path, _src = self._is_valid_dest(src, "r")
         serializer = self.get_serializer_by_src(_src)
         if serializer is None:
@@ -132,19 +208,33 @@ class Serializer:
 
         if from_path:
             with _src as _src:
-                result = serializer.deserialize(_src)
+                result = self._deserialize(serializer, _src, prefetch, verify, options)
                 return map(result)
         else:
-            result = serializer.deserialize(_src)
+            result = self._deserialize(serializer, _src, prefetch, verify, options)
             return map(result)
 
+    @staticmethod
+    def _deserialize(serializer, src, prefetch, verify, options):
+        if verify and serializer.verify_on_read:
+            options = dict(options, verify=True)
+        elif verify:
+            errors = verify_group(src)
+            if errors:
+                raise ChecksumError("\n".join(errors))
+
+        result = serializer.deserialize(src, **options)
+        if prefetch and isinstance(result, ReIterable):
+            result = result.with_prefetch(prefetch)
+        return result
+
     @contextmanager
-    def load_with(self, src):
+    def load_with(self, src, **options):
         if not isinstance(src, (str, Path)):
             raise Exception()
 
         with h5py.File(src, "r") as f:
-            yield self.load(f)
+            yield self.load(f, **options)
 
     def load_meta(self, src):
         dic = self.load_info(src, attrs=["meta"])
@@ -154,11 +244,81 @@ class Serializer:
         self, src, attrs=["appname", "name", "created_at", "updated_at", "meta"]
     ):
         from_path, _src = self._is_valid_dest(src, "r")
-        dic = {k: _src.attrs[k] for k in attrs}
+        try:
+            dic = {k: _src.attrs[k] for k in attrs}
+        finally:
+            if from_path:
+                _src.close()
         if "meta" in dic:
             dic["meta"] = json.loads(dic["meta"])
         return dic
 
+    def open_swmr_writer(
+        self, dest, kind="weights", *, meta=None, overwrite: bool = False
+    ) -> SwmrWriter:
+        if not isinstance(dest, (str, Path)):
+            raise Exception()
+
+        serializer = appendable_serializers[kind]
+        mode = "w" if overwrite else "w-"
+        f = h5py.File(dest, mode, libver="latest", track_order=serializer.track_order)
+        try:
+            # attrs can not be updated in swmr mode, so no checksum is kept
+            self._save(f, [], serializer, meta=meta, checksum=False)
+            return SwmrWriter(f, serializer)
+        except BaseException:
+            f.close()
+            raise
+
+    def open_writer(
+        self,
+        dest,
+        kind="weights",
+        *,
+        meta=None,
+        overwrite: bool = False,
+        fsync=True,
+        on_commit=None,
+        **options,
+    ) -> StreamWriter:
+        """Write "weights" (layers) or "bytes" piece by piece with `append`.
+
+        The entry appears at `dest` only when the writer is closed without error.
+        `options` are those of `save_weights` except `workers`.
+        """
+        if not isinstance(dest, (str, Path)):
+            raise Exception()
+        if meta is not None and not isinstance(meta, dict):
+            raise TypeError("meta must be dict.")
+
+        created_at = utc_now_isoformat()
+
+        def finalize(f: h5py.File, serializer):
+            f.attrs["created_at"] = created_at
+            self._write_attrs(f, serializer, meta)
+            write_checksum(f)
+
+        return StreamWriter(
+            dest,
+            kind,
+            finalize=finalize,
+            overwrite=overwrite,
+            fsync=fsync,
+            on_commit=on_commit,
+            **options,
+        )
+
+    def open_swmr_reader(self, src) -> SwmrReader:
+        if not isinstance(src, (str, Path)):
+            raise Exception()
+
+        f = h5py.File(src, "r", libver="latest", swmr=True)
+        serializer = self.get_serializer_by_src(f)
+        if serializer not in appendable_serializers.values():
+            f.close()
+            raise Exception(f"{src} is not written in swmr mode.")
+        return SwmrReader(f, serializer)
+
     def _is_valid_dest(
         self, dest, mode, track_order: bool = False
     ) -> "str | h5py.File | h5py.Group":
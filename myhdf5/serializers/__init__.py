@@ -1,7 +1,12 @@
 from .impl import (
     ByteSerializer,
+    ByteStreamSerializer,
+    CheckpointsSerializer,
+    DataframeSerializer,
     Hdf5Serializer,
     JsonSerializer,
     NdarraySerializer,
+    PickleSerializer,
+    StateDictSerializer,
     WieghtsSerializer,
 )
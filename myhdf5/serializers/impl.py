@@ -1,10 +1,31 @@
 import json
+import os
+import pickle
+import sys
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Iterable, Iterator, Optional
 
 import h5py
 import numpy as np
 
 from myhdf5.abc import BaseSerializer, ReIterable
+from myhdf5.checksum import ATTR, data_checksum, verify_dataset
+from myhdf5.chunks import chunk_shape, read_dataset, write_layers
 from myhdf5.exceptions import FileAlreadyClosedError, SerializeError
+from myhdf5.quantize import dequantize_layer, is_quantizable, quantize_layer
+from myhdf5.sparse import SparseLayer, sparsity
+
+MAX_ROWS = 1000000000
+FILL = len(str(MAX_ROWS))
+
+
+def row_name(i: int) -> str:
+    """Name of the i-th row dataset. Names sort in the order of rows."""
+    if i > MAX_ROWS:
+        raise ValueError()
+    return str(i).zfill(FILL)
 
 
 class Hdf5Serializer(BaseSerializer):
@@ -32,11 +53,18 @@ class JsonSerializer(BaseSerializer):
     name = "json"
     priority = -50
 
-    @staticmethod
-    def is_instance(obj):
-        return obj is None or isinstance(
-            obj, (str, int, float, bool, list, dict, set, tuple)
-        )
+    @classmethod
+    def is_instance(cls, obj):
+        # containers are checked deeply, so that e.g. dict of ndarray is not taken
+        if obj is None or isinstance(obj, (str, int, float, bool)):
+            return True
+        if isinstance(obj, (list, tuple)):
+            return all(cls.is_instance(x) for x in obj)
+        if isinstance(obj, dict):
+            return all(
+                isinstance(k, str) and cls.is_instance(v) for k, v in obj.items()
+            )
+        return False
 
     @staticmethod
     def serialize(grp: h5py.Group, obj):
@@ -68,9 +96,167 @@ class NdarraySerializer(BaseSerializer):
 
 
 class DataframeSerializer(BaseSerializer):
+    """pandas.DataFrame stored by column.
+
+    Each column is a chunked and compressed dataset under "columns", so that a
+    projection reads only the requested columns and a row range reads only the
+    chunks of those rows. String, object and categorical columns are dictionary
+    encoded: the dataset holds codes (-1 for missing) and the values are kept
+    under "dictionaries". The index is stored the same way as "index", except
+    for RangeIndex which is kept in attrs.
+    """
+
     name = "dataframe"
     priority = -50
 
+    @staticmethod
+    def is_instance(obj):
+        pd = sys.modules.get("pandas", None)
+        return pd is not None and isinstance(obj, pd.DataFrame)
+
+    @classmethod
+    def serialize(
+        cls,
+        grp: h5py.Group,
+        obj,
+        compression: Optional[str] = "gzip",
+        compression_opts: Optional[int] = None,
+    ):
+        import pandas as pd
+
+        if isinstance(obj.columns, pd.MultiIndex) or isinstance(
+            obj.index, pd.MultiIndex
+        ):
+            raise SerializeError("MultiIndex is not supported.")
+        if not obj.columns.is_unique:
+            raise SerializeError("Column names must be unique.")
+
+        names = list(obj.columns)
+        try:
+            grp.attrs["columns"] = json.dumps(names, ensure_ascii=False)
+            grp.attrs["index_name"] = json.dumps(obj.index.name, ensure_ascii=False)
+        except TypeError as e:
+            raise SerializeError(f"Names must be JSON serializable: {e}")
+        grp.attrs["nrows"] = len(obj)
+
+        kwargs = dict(compression=compression, compression_opts=compression_opts)
+        columns = grp.create_group("columns", track_order=True)
+        dictionaries = grp.create_group("dictionaries")
+        for i, name in enumerate(names):
+            key = str(i).zfill(6)
+            cls._write_column(columns, dictionaries, key, obj.iloc[:, i], kwargs)
+
+        if isinstance(obj.index, pd.RangeIndex):
+            index = obj.index
+            grp.attrs["index_range"] = [index.start, index.stop, index.step]
+        else:
+            cls._write_column(grp, dictionaries, "index", obj.index, kwargs)
+
+    @classmethod
+    def _write_column(cls, grp: h5py.Group, dictionaries, key, values, kwargs):
+        import pandas as pd
+
+        dtype = values.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            categorical = values.array
+            codes, uniques = categorical.codes, categorical.categories
+            attrs = {"encoding": "dictionary", "ordered": bool(dtype.ordered)}
+        elif pd.api.types.is_string_dtype(dtype) or dtype == object:
+            codes, uniques = pd.factorize(values)
+            attrs = {"encoding": "dictionary"}
+        elif isinstance(dtype, np.dtype) and dtype.kind in "mM":
+            data, attrs = np.asarray(values).view(np.int64), {}
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biufc":
+            data, attrs = np.asarray(values), {}
+        else:
+            raise SerializeError(f"Unsupported dtype: {dtype}")
+
+        if attrs.get("encoding", None) == "dictionary":
+            code_dtype = np.int32 if len(uniques) < 2**31 else np.int64
+            data = np.asarray(codes).astype(code_dtype)
+            cls._write_dataset(dictionaries, key, cls._encode_values(uniques), {}, {})
+
+        attrs["dtype"] = str(dtype)
+        cls._write_dataset(grp, key, data, attrs, kwargs)
+
+    @staticmethod
+    def _encode_values(values) -> np.ndarray:
+        values = np.asarray(values)
+        if values.dtype.kind in "biufc":
+            return values
+        if not all(isinstance(x, str) for x in values):
+            raise SerializeError("Only str values are supported by object columns.")
+        # fixed length bytes, as h5py can not store numpy unicode strings
+        encoded = [x.encode("utf-8") for x in values]
+        itemsize = max([1] + [len(x) for x in encoded])
+        return np.array(encoded, dtype=f"S{itemsize}")
+
+    @staticmethod
+    def _write_dataset(grp: h5py.Group, key, data: np.ndarray, attrs, kwargs):
+        if kwargs.get("compression") is not None and data.size:
+            kwargs = dict(kwargs, chunks=chunk_shape(data.shape, data.dtype.itemsize))
+        else:
+            kwargs = {}
+        ds = grp.create_dataset(key, data=data, **kwargs)
+        ds.attrs.update(attrs)
+        ds.attrs[ATTR] = data_checksum(data)
+
+    @classmethod
+    def deserialize(cls, grp: h5py.Group, columns=None, rows=None):
+        """columns: names of columns to read. All columns by default.
+        rows: slice or (start, stop) of rows to read.
+        """
+        import pandas as pd
+
+        names = json.loads(grp.attrs["columns"])
+        if columns is None:
+            columns = names
+        if isinstance(rows, tuple):
+            rows = slice(*rows)
+        elif rows is None:
+            rows = slice(None)
+        positions = {name: i for i, name in enumerate(names)}
+
+        data = {}
+        for name in columns:
+            if name not in positions:
+                raise KeyError(name)
+            key = str(positions[name]).zfill(6)
+            data[name] = cls._read_column(grp["columns"][key], grp, key, rows)
+
+        index_name = json.loads(grp.attrs["index_name"])
+        if "index_range" in grp.attrs:
+            index = pd.RangeIndex(*(int(x) for x in grp.attrs["index_range"]))
+            index = index[rows]
+            index.name = index_name
+        else:
+            index = pd.Index(cls._read_column(grp["index"], grp, "index", rows))
+            index.name = index_name
+
+        return pd.DataFrame(data, index=index, columns=list(columns))
+
+    @classmethod
+    def _read_column(cls, ds: h5py.Dataset, grp: h5py.Group, key, rows: slice):
+        import pandas as pd
+
+        dtype = ds.attrs["dtype"]
+        data = ds[rows]
+        if ds.attrs.get("encoding", None) != "dictionary":
+            return data.view(dtype) if np.dtype(dtype).kind in "mM" else data
+
+        values = grp["dictionaries"][key][()]
+        if values.dtype.kind == "S":
+            values = np.array([x.decode("utf-8") for x in values], dtype=object)
+        if dtype == "category":
+            return pd.Categorical.from_codes(
+                data, values, ordered=bool(ds.attrs["ordered"])
+            )
+
+        out = np.empty(len(data), dtype=object)
+        out[:] = values.take(data, mode="clip") if len(values) else None
+        out[data < 0] = None
+        return pd.array(out, dtype=dtype)
+
 
 class ByteSerializer(BaseSerializer):
     name = "bytes"
@@ -139,18 +325,18 @@ class ByteSerializer(BaseSerializer):
 
         cls._create_datasets(grp, chunksize=chunksize, chunks=it)
 
-    @staticmethod
-    def _create_datasets(grp: h5py.Group, chunksize, chunks):
+    @classmethod
+    def _create_datasets(cls, grp: h5py.Group, chunksize, chunks):
         grp.attrs["chunksize"] = chunksize
-        MAX_ROWS = 1000000000
-        FILL = len(str(MAX_ROWS))
         for i, row in enumerate(chunks):
-            if not isinstance(row, bytes):
-                raise TypeError()
-            ds = grp.create_dataset(str(i).zfill(FILL), dtype="V1")
-            ds.attrs["value"] = np.void(row)
-        if i > MAX_ROWS:
-            raise ValueError()
+            cls._create_dataset(grp, i, row)
+
+    @staticmethod
+    def _create_dataset(grp: h5py.Group, i: int, row: bytes):
+        if not isinstance(row, bytes):
+            raise TypeError()
+        ds = grp.create_dataset(row_name(i), dtype="V1")
+        ds.attrs["value"] = np.void(row)
 
     @staticmethod
     def deserialize(grp: h5py.Group):
@@ -168,37 +354,435 @@ class WieghtsSerializer(BaseSerializer):
     name = "List[ndarray]"
     priority = -100
     track_order = True
+    verify_on_read = True
 
     @staticmethod
     def is_instance(obj):
-        if isinstance(obj, (str, bytes)):
-            return False
+        if isinstance(obj, list):
+            return all(isinstance(x, (np.ndarray, SparseLayer)) for x in obj)
+
+        # lazily generated layers can not be inspected in advance
+        if isinstance(obj, (Iterator, ReIterable)):
+            return True
+
+        return False
 
-        if isinstance(obj, (set, dict, tuple)):
+    @classmethod
+    def serialize(
+        cls,
+        grp: h5py.Group,
+        obj,
+        quantize: Optional[str] = None,
+        channel_axis: Optional[int] = None,
+        sparse_threshold: Optional[float] = None,
+        compression: Optional[str] = None,
+        compression_opts: Optional[int] = None,
+        workers: int = 0,
+    ):
+        """quantize: None (lossless), "float16", "bfloat16" or "int8".
+
+        Only floating point layers are quantized. With "int8", `channel_axis`
+        gives a scale per channel instead of per layer.
+        Layers whose ratio of zeros exceeds `sparse_threshold`, and `SparseLayer`s,
+        are stored as COO (indices, values, shape) in a group.
+        With `compression="gzip"` and `workers`, chunks of layers are compressed
+        on a thread pool and written with `write_direct_chunk`.
+        """
+        items = cls._iter_datasets(grp, obj, quantize, channel_axis, sparse_threshold)
+        write_layers(
+            items,
+            compression=compression,
+            compression_opts=compression_opts,
+            workers=workers,
+        )
+
+    @classmethod
+    def _iter_datasets(
+        cls, grp, obj, quantize, channel_axis, sparse_threshold, start: int = 0
+    ):
+        for i, row in enumerate(obj, start):
+            name = row_name(i)
+            if isinstance(row, np.ndarray):
+                if sparse_threshold is not None and sparsity(row) > sparse_threshold:
+                    row = SparseLayer.from_dense(row)
+                else:
+                    yield cls._encode(grp, name, row, quantize, channel_axis)
+                    continue
+
+            if not isinstance(row, SparseLayer):
+                raise TypeError()
+            sub = grp.create_group(name)
+            sub.attrs["encoding"] = "coo"
+            yield sub, "indices", row.indices, {}
+            yield sub, "shape", np.array(row.shape, dtype=np.int64), {}
+            yield cls._encode(sub, "values", row.values, quantize, None)
+
+    @staticmethod
+    def _encode(grp: h5py.Group, name, row, quantize, channel_axis):
+        if quantize and is_quantizable(row):
+            data, attrs = quantize_layer(row, quantize, channel_axis)
+            return grp, name, data, attrs
+        return grp, name, row, {}
+
+    @classmethod
+    def deserialize(
+        cls,
+        grp: h5py.Group,
+        dequantize: bool = True,
+        sparse="dense",
+        workers=0,
+        verify: bool = False,
+    ):
+        """sparse: how to return layers stored as COO. "dense", "coo" or "scipy".
+
+        With `workers`, compressed chunks are decompressed on a thread pool.
+        With `verify`, checksums are checked against the data as it is read.
+        """
+        if sparse not in ("dense", "coo", "scipy"):
+            raise ValueError(f"Unknown sparse format: {sparse}")
+
+        def iter_layers():
+            with ThreadPoolExecutor(workers) if workers else nullcontext() as pool:
+                for name in list(grp):
+                    raise_if_close(grp)
+                    yield cls.read_layer(
+                        grp[name],
+                        dequantize=dequantize,
+                        sparse=sparse,
+                        pool=pool,
+                        verify=verify,
+                    )
+
+        func = lambda: raise_if_close(grp) and iter_layers()
+        return ReIterable(func)
+
+    @classmethod
+    def read_layer(
+        cls, obj, dequantize: bool = True, sparse="dense", pool=None, verify=False
+    ):
+        if isinstance(obj, h5py.Group):
+            layer = SparseLayer(
+                cls.read_layer(obj["indices"], pool=pool, verify=verify),
+                cls.read_layer(
+                    obj["values"], dequantize=dequantize, pool=pool, verify=verify
+                ),
+                tuple(int(x) for x in cls.read_layer(obj["shape"], verify=verify)),
+            )
+            if sparse == "coo":
+                return layer
+            elif sparse == "scipy":
+                return layer.toscipy()
+            else:
+                return layer.todense()
+
+        data = read_dataset(obj, pool)
+        if verify:
+            verify_dataset(obj, data)
+        if dequantize and "encoding" in obj.attrs:
+            return dequantize_layer(data, obj.attrs)
+        return data
+
+
+class StateDictSerializer(BaseSerializer):
+    """Dict[str, ndarray] such as state_dict. Dotted names are nested groups.
+
+    {"encoder.layer0.weight": w} is stored as the dataset "encoder/layer0/weight".
+    The keys in insertion order are stored in the dataset ".keys", which can not
+    conflict with a key.
+    """
+
+    name = "Dict[str, ndarray]"
+    priority = -100
+    track_order = True
+    verify_on_read = True
+    KEYS = ".keys"
+
+    @staticmethod
+    def is_instance(obj):
+        if not isinstance(obj, dict) or not obj:
             return False
+        return all(
+            isinstance(k, str) and isinstance(v, np.ndarray) for k, v in obj.items()
+        )
 
-        if hasattr(obj, "__iter__"):
-            return True
+    @classmethod
+    def serialize(
+        cls,
+        grp: h5py.Group,
+        obj,
+        quantize: Optional[str] = None,
+        channel_axis: Optional[int] = None,
+        compression: Optional[str] = None,
+        compression_opts: Optional[int] = None,
+        workers: int = 0,
+    ):
+        """Options are the same as `WieghtsSerializer.serialize`."""
+        # groups are created while datasets are written, possibly on worker threads
+        cls.check_keys(obj)
+        write_layers(
+            cls._iter_datasets(grp, obj, quantize, channel_axis),
+            compression=compression,
+            compression_opts=compression_opts,
+            workers=workers,
+        )
+        grp.create_dataset(cls.KEYS, data=list(obj), dtype=h5py.string_dtype())
+
+    @classmethod
+    def _iter_datasets(cls, grp, obj, quantize, channel_axis):
+        for key, value in obj.items():
+            *parents, name = cls.split_key(key)
+            sub = grp
+            for parent in parents:
+                if parent not in sub:
+                    sub.create_group(parent, track_order=True)
+                sub = sub[parent]
+                if not isinstance(sub, h5py.Group):
+                    raise SerializeError(f"{key}: conflicts with another key")
+            if name in sub:
+                raise SerializeError(f"{key}: conflicts with another key")
+            yield WieghtsSerializer._encode(sub, name, value, quantize, channel_axis)
+
+    @staticmethod
+    def split_key(key: str):
+        names = key.split(".")
+        if "/" in key or not all(names):
+            raise SerializeError(f"Invalid key: {key!r}")
+        return names
 
+    @classmethod
+    def check_keys(cls, keys: Iterable[str]):
+        """Raise SerializeError if a key is invalid or a prefix of another key."""
+        names, parents = set(), set()
+        for key in keys:
+            *prefix, name = cls.split_key(key)
+            names.add(key)
+            parents.update(".".join(prefix[: i + 1]) for i in range(len(prefix)))
+        conflicts = sorted(names & parents)
+        if conflicts:
+            raise SerializeError(f"{conflicts[0]}: conflicts with another key")
+
+    @classmethod
+    def deserialize(
+        cls,
+        grp: h5py.Group,
+        dequantize: bool = True,
+        verify: bool = False,
+    ):
+        """Return a read-only mapping. A value is read when it is accessed."""
+        raise_if_close(grp)
+        return LazyStateDict(grp, dequantize=dequantize, verify=verify)
+
+    @staticmethod
+    def is_only_opend():
+        return True
+
+
+class LazyStateDict(Mapping):
+    def __init__(self, grp: h5py.Group, dequantize: bool = True, verify=False):
+        self.grp = grp
+        self.dequantize = dequantize
+        self.verify = verify
+        if StateDictSerializer.KEYS in grp:
+            keys = grp[StateDictSerializer.KEYS].asstr()[()]
+        else:
+            keys = self._iter_keys(grp, "")  # grouped by prefix
+        self._keys = dict.fromkeys(keys)
+
+    @classmethod
+    def _iter_keys(cls, grp: h5py.Group, prefix: str):
+        for name, obj in grp.items():
+            if name.startswith("."):
+                continue
+            if isinstance(obj, h5py.Dataset) or obj.attrs.get("encoding") == "coo":
+                yield prefix + name
+            else:
+                yield from cls._iter_keys(obj, prefix + name + ".")
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key not in self._keys:
+            raise KeyError(key)
+        raise_if_close(self.grp)
+        return WieghtsSerializer.read_layer(
+            self.grp[key.replace(".", "/")],
+            dequantize=self.dequantize,
+            verify=self.verify,
+        )
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {len(self)} keys>"
+
+
+class CheckpointsSerializer(BaseSerializer):
+    """Checkpoints of weights stacked on a leading axis, appendable in SWMR mode."""
+
+    name = "checkpoints"
+    priority = -100
+    track_order = True
+
+    @staticmethod
+    def is_instance(obj):
         return False
 
+    @classmethod
+    def serialize(cls, grp: h5py.Group, obj):
+        for weights in obj:
+            cls.append(grp, weights)
+
     @staticmethod
-    def serialize(grp: h5py.Group, obj):
-        i = -1
-        MAX_ROWS = 1000000000
-        FILL = len(str(MAX_ROWS))
-        for i, row in enumerate(obj):
-            if not isinstance(row, np.ndarray):
-                raise TypeError()
-            grp.create_dataset(str(i).zfill(FILL), data=row)
-        if i > MAX_ROWS:
-            raise ValueError()
+    def append(grp: h5py.Group, weights):
+        weights = list(weights)
+        if len(grp) == 0:
+            for i, row in enumerate(weights):
+                if not isinstance(row, np.ndarray):
+                    raise TypeError()
+                grp.create_dataset(
+                    row_name(i),
+                    shape=(0,) + row.shape,
+                    maxshape=(None,) + row.shape,
+                    chunks=(1,) + row.shape if row.size else True,
+                    dtype=row.dtype,
+                )
+
+        datasets = list(grp.values())
+        if len(datasets) != len(weights):
+            raise ValueError("Number of layers does not match.")
+
+        for ds, row in zip(datasets, weights):
+            n = ds.shape[0]
+            ds.resize(n + 1, axis=0)
+            ds[n] = row
 
     @staticmethod
     def deserialize(grp: h5py.Group):
-        func = lambda: raise_if_close(grp) and (x[::] for x in grp.values())
+        func = lambda: raise_if_close(grp) and (x[-1] for x in grp.values())
         return ReIterable(func)
 
+    @staticmethod
+    def is_only_opend():
+        return True
+
+
+class ByteStreamSerializer(BaseSerializer):
+    """Bytes in one resizable dataset, appendable in SWMR mode."""
+
+    name = "bytes_stream"
+    priority = -100
+
+    @staticmethod
+    def is_instance(obj):
+        return False
+
+    @classmethod
+    def serialize(cls, grp: h5py.Group, obj):
+        _chunksize = 1024 * 32
+        grp.attrs["chunksize"] = _chunksize
+        grp.create_dataset(
+            "value", shape=(0,), maxshape=(None,), chunks=(_chunksize,), dtype="u1"
+        )
+        for buf in obj:
+            cls.append(grp, buf)
+
+    @staticmethod
+    def append(grp: h5py.Group, buf: bytes):
+        if not isinstance(buf, bytes):
+            raise TypeError()
+        if not buf:
+            return
+        ds = grp["value"]
+        n = ds.shape[0]
+        ds.resize(n + len(buf), axis=0)
+        ds[n:] = np.frombuffer(buf, dtype="u1")
+
+    @staticmethod
+    def deserialize(grp: h5py.Group):
+        def func():
+            raise_if_close(grp)
+            ds, chunksize = grp["value"], int(grp.attrs["chunksize"])
+            return (
+                ds[i : i + chunksize].tobytes() for i in range(0, len(ds), chunksize)
+            )
+
+        return ReIterable(func)
+
+    @staticmethod
+    def is_only_opend():
+        return True
+
+
+class PickleSerializer(BaseSerializer):
+    """Any picklable object, with buffers of pickle protocol 5 stored out-of-band.
+
+    Large buffers (e.g. ndarray) are written as separate datasets instead of being
+    copied into the pickle stream, and memory mapped on load when possible.
+
+    Unpickling can execute arbitrary code, so this is never chosen by value and
+    loading requires an opt-in:
+
+    ModelFile.save(f, obj, serializer=PickleSerializer)
+    ModelFile.load(f, allow_pickle=True)  # only trusted files
+    """
+
+    name = "pickle"
+    priority = -200
+
+    @staticmethod
+    def is_instance(obj):
+        return False  # only by `serializer=PickleSerializer`
+
+    @staticmethod
+    def serialize(grp: h5py.Group, obj):
+        buffers: list = []
+        data = np.frombuffer(
+            pickle.dumps(obj, protocol=5, buffer_callback=buffers.append), dtype="u1"
+        )
+        ds = grp.create_dataset("pickle", data=data)
+        ds.attrs[ATTR] = data_checksum(data)
+
+        sub = grp.create_group("buffers", track_order=True)
+        for i, buf in enumerate(buffers):
+            raw = np.frombuffer(buf.raw(), dtype="u1")
+            ds = sub.create_dataset(row_name(i), data=raw)
+            # from memory, so the checksum of the file does not read it back
+            ds.attrs[ATTR] = data_checksum(raw)
+
+    @staticmethod
+    def deserialize(grp: h5py.Group, lazy: bool = True, allow_pickle: bool = False):
+        """lazy: memory map the buffers instead of reading them.
+        allow_pickle: unpickle. Raise SerializeError unless True.
+        """
+        if not allow_pickle:
+            raise SerializeError(
+                "Loading a pickle can execute arbitrary code. "
+                "Pass allow_pickle=True for trusted files."
+            )
+        buffers = [
+            map_dataset(ds) if lazy else ds[()] for ds in grp["buffers"].values()
+        ]
+        return pickle.loads(grp["pickle"][()].tobytes(), buffers=buffers)
+
+
+def map_dataset(ds: h5py.Dataset) -> np.ndarray:
+    """Return a copy-on-write memory map of a contiguous dataset, or read it."""
+    offset = ds.id.get_offset()
+    filename = ds.file.filename
+    if (
+        offset is None
+        or ds.chunks is not None
+        or ds.file.driver not in ("sec2", "stdio")
+        or not os.path.isfile(filename)
+    ):
+        return ds[()]
+    return np.memmap(filename, dtype=ds.dtype, mode="c", offset=offset, shape=ds.shape)
+
 
 def raise_if_close(grp: h5py.Group):
     is_closed = False
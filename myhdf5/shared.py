@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional, Sequence
+
+import h5py
+import numpy as np
+
+from .cache import file_version
+from .exceptions import SerializeError
+from .serializers import WieghtsSerializer
+
+"""
+Weights shared by processes on a host.
+
+The layers of a weights file are read once into a shared memory segment, and every
+process maps the segment and gets read-only ndarray views without copying.
+
+with load_shared("model.hdf5") as weights:  # in each worker
+    weights[0]
+
+A segment is named by the path and the version of the file (inode, mtime, size).
+Processes holding it are counted in its header, and the segment is unlinked when
+the last one releases it after the file was updated, or when a newer version is
+loaded while nobody holds it. Segments of the current version are kept for
+processes started later, until `unlink_shared(path)`.
+
+Creation is serialized by `flock` on a lock file, so this requires POSIX.
+"""
+
+MAGIC = b"MYHDF5SM"
+HEADER = struct.Struct("<8sIxxxxqq")  # magic, ready, refs, table length
+ALIGN = 64
+PREFIX = "mh5_"
+
+
+def _path_key(path) -> str:
+    return hashlib.md5(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+
+
+def segment_name(path, version) -> str:
+    digest = hashlib.md5(repr(version).encode("utf-8")).hexdigest()[:12]
+    return f"{PREFIX}{_path_key(path)}_{digest}"
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _data_start(table_len: int) -> int:
+    return _align(HEADER.size + table_len)
+
+
+@contextmanager
+def _locked(path):
+    import fcntl
+
+    lock_path = os.path.join(tempfile.gettempdir(), f"{PREFIX}{_path_key(path)}.lock")
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _open(name, create=False, size=0) -> shared_memory.SharedMemory:
+    # segments outlive the process which created them, so they must not be
+    # unlinked by the resource tracker at exit
+    try:
+        return shared_memory.SharedMemory(name, create, size, track=False)
+    except TypeError:  # python < 3.13
+        shm = shared_memory.SharedMemory(name, create, size)
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore
+        return shm
+
+
+def _unlink(shm: shared_memory.SharedMemory):
+    if not getattr(shm, "_track", False):
+        # unlink() of python < 3.13 unregisters the segment from the tracker
+        resource_tracker.register(shm._name, "shared_memory")  # type: ignore
+    shm.unlink()
+
+
+def _read_header(shm: shared_memory.SharedMemory):
+    magic, ready, refs, table_len = HEADER.unpack_from(shm.buf, 0)
+    if magic != MAGIC:
+        return False, 0, 0
+    return bool(ready), refs, table_len
+
+
+def _add_refs(shm: shared_memory.SharedMemory, n: int) -> int:
+    ready, refs, table_len = _read_header(shm)
+    refs = max(refs + n, 0)
+    HEADER.pack_into(shm.buf, 0, MAGIC, int(ready), refs, table_len)
+    return refs
+
+
+class SharedWeights(Sequence):
+    """Read-only layers in a shared memory segment. Close to release it."""
+
+    def __init__(self, path, version, shm: shared_memory.SharedMemory):
+        self.path = os.path.abspath(path)
+        self.version = version
+        self._shm: Optional[shared_memory.SharedMemory] = shm
+        _, _, table_len = _read_header(shm)
+        table = json.loads(bytes(shm.buf[HEADER.size : HEADER.size + table_len]))
+        start = _data_start(table_len)
+        self._layers: List[np.ndarray] = []
+        for item in table:
+            layer = np.ndarray(
+                tuple(item["shape"]),
+                dtype=np.dtype(item["dtype"]),
+                buffer=shm.buf,
+                offset=start + item["offset"],
+            )
+            layer.setflags(write=False)
+            self._layers.append(layer)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name if self._shm is not None else ""
+
+    @property
+    def closed(self) -> bool:
+        return self._shm is None
+
+    def __getitem__(self, index):
+        if self._shm is None:
+            raise ValueError("SharedWeights is already closed.")
+        return self._layers[index]
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def close(self):
+        """Release the segment. Views still referenced elsewhere keep it mapped."""
+        if self._shm is None:
+            return
+        shm, self._shm = self._shm, None
+        self._layers = []
+        with _locked(self.path):
+            refs = _add_refs(shm, -1)
+            if refs == 0 and not _is_current(self.path, self.version):
+                _unlink(shm)
+        try:
+            shm.close()
+        except BufferError:
+            ...  # exported views are alive. unmapped when they are collected
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            ...
+
+    def __repr__(self):
+        return f"<SharedWeights {self.name} {len(self)} layers>"
+
+
+def _is_current(path, version) -> bool:
+    try:
+        return file_version(path) == version
+    except FileNotFoundError:
+        return False
+
+
+def load_shared(path) -> SharedWeights:
+    """Map the weights of `path` from shared memory, creating the segment once."""
+    path = os.path.abspath(path)
+    version = file_version(path)
+    name = segment_name(path, version)
+    with _locked(path):
+        _unlink_stale(path, keep=name)
+        try:
+            shm = _open(name)
+        except FileNotFoundError:
+            shm = None
+
+        if shm is not None and not _read_header(shm)[0]:
+            _unlink(shm)  # the creator failed before the segment was ready
+            shm.close()
+            shm = None
+
+        if shm is None:
+            shm = _create(name, path)
+        _add_refs(shm, 1)
+    return SharedWeights(path, version, shm)
+
+
+def _layer_specs(f: h5py.File):
+    if f.attrs.get("name", None) != WieghtsSerializer.name:
+        raise SerializeError(f"{f.filename}: not weights. {f.attrs.get('name')}")
+    specs = []
+    for key in list(f):
+        obj = f[key]
+        if isinstance(obj, h5py.Group):
+            shape = tuple(int(x) for x in obj["shape"][()])
+            attrs = obj["values"].attrs
+            dtype = obj["values"].dtype
+        else:
+            shape, attrs, dtype = obj.shape, obj.attrs, obj.dtype
+        if "encoding" in attrs:
+            dtype = attrs["dtype"]
+        specs.append((obj, shape, np.dtype(dtype)))
+    return specs
+
+
+def _create(name, path) -> shared_memory.SharedMemory:
+    with h5py.File(path, "r") as f:
+        specs = _layer_specs(f)
+        table = []
+        size = 0  # offsets are relative to the end of the table
+        for obj, shape, dtype in specs:
+            table.append({"shape": list(shape), "dtype": dtype.str, "offset": size})
+            size = _align(size + int(np.prod(shape, dtype=np.int64)) * dtype.itemsize)
+        encoded = json.dumps(table).encode("utf-8")
+        start = _data_start(len(encoded))
+
+        shm = _open(name, create=True, size=max(start + size, 1))
+        try:
+            HEADER.pack_into(shm.buf, 0, MAGIC, 0, 0, len(encoded))
+            shm.buf[HEADER.size : HEADER.size + len(encoded)] = encoded
+            for item, (obj, shape, dtype) in zip(table, specs):
+                offset = start + item["offset"]
+                out = np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+                if (
+                    isinstance(obj, h5py.Dataset)
+                    and "encoding" not in obj.attrs
+                    and out.size
+                ):
+                    obj.read_direct(out)
+                else:
+                    out[...] = WieghtsSerializer.read_layer(obj)
+                del out
+            HEADER.pack_into(shm.buf, 0, MAGIC, 1, 0, len(encoded))
+        except BaseException:
+            _unlink(shm)
+            shm.close()
+            raise
+    return shm
+
+
+def _segments(path) -> List[str]:
+    prefix = f"{PREFIX}{_path_key(path)}_"
+    try:
+        return [x for x in os.listdir("/dev/shm") if x.startswith(prefix)]
+    except FileNotFoundError:
+        return []  # segments are not listable on this platform
+
+
+def _unlink_stale(path, keep: Optional[str] = None, force: bool = False) -> int:
+    unlinked = 0
+    for name in _segments(path):
+        if name == keep:
+            continue
+        try:
+            shm = _open(name)
+        except FileNotFoundError:
+            continue
+        if force or _read_header(shm)[1] == 0:
+            _unlink(shm)
+            unlinked += 1
+        shm.close()
+    return unlinked
+
+
+def unlink_shared(path, force: bool = False) -> int:
+    """Unlink segments of `path` held by no process. Return the number unlinked.
+
+    force: also unlink segments still counted as held, e.g. by crashed processes.
+    Processes mapping them keep their views.
+    """
+    path = os.path.abspath(path)
+    with _locked(path):
+        return _unlink_stale(path, force=force)
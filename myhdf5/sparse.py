@@ -0,0 +1,73 @@
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+
+class SparseLayer(NamedTuple):
+    """Layer in COO format with flat (raveled) indices."""
+
+    indices: np.ndarray
+    values: np.ndarray
+    shape: Tuple[int, ...]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    @property
+    def sparsity(self) -> float:
+        return 1 - len(self.values) / self.size if self.size else 0.0
+
+    @classmethod
+    def from_dense(cls, layer: np.ndarray) -> "SparseLayer":
+        flat = layer.reshape(-1)
+        indices = np.flatnonzero(flat).astype(index_dtype(flat.size))
+        return cls(indices, flat[indices], layer.shape)
+
+    def todense(self) -> np.ndarray:
+        out = np.zeros(self.size, dtype=self.dtype)
+        out[self.indices] = self.values
+        return out.reshape(self.shape)
+
+    def toscipy(self):
+        try:
+            import scipy.sparse
+        except ImportError as e:
+            raise ImportError(
+                'sparse="scipy" requires scipy. Install it by '
+                '`pip install h5pyex[sparse]`, or use sparse="coo".'
+            ) from e
+
+        if self.ndim != 2:
+            raise ValueError(f"scipy sparse requires 2 dimensions: {self.shape}")
+        rows, cols = np.unravel_index(self.indices, self.shape)
+        return scipy.sparse.coo_matrix((self.values, (rows, cols)), shape=self.shape)
+
+    def accumulate(self, out: np.ndarray, weight=1):
+        """out += self * weight, without densifying. Duplicate indices are summed."""
+        values = self.values if weight == 1 else self.values * weight
+        if out.flags.c_contiguous:
+            np.add.at(out.reshape(-1), self.indices, values)
+        else:
+            # reshape would return a copy
+            np.add.at(out, np.unravel_index(self.indices, out.shape), values)
+
+
+def index_dtype(size: int) -> np.dtype:
+    return (
+        np.dtype(np.uint32) if size <= np.iinfo(np.uint32).max else np.dtype(np.uint64)
+    )
+
+
+def sparsity(layer: np.ndarray) -> float:
+    if not layer.size:
+        return 0.0
+    return 1 - np.count_nonzero(layer) / layer.size
@@ -1,14 +1,59 @@
+import itertools
+import json
 import os
-from typing import TYPE_CHECKING, Set
+import shutil
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+
+import h5py
 
 from .abc import BaseSerializer, extensionmethod
-from .directory import InfinityTempNames, RealDir
+from .cache import ModelCache, materialize
+from .checksum import verify, verify_file
+from .chunks import recompress_file
+from .directory import (
+    DEFAULT_MAX_PUBLISHED,
+    InfinityTempNames,
+    RealDir,
+    atomic_temp_name,
+    commit_file,
+    copy_file,
+    is_hidden,
+    link_file,
+    read_layout,
+    reshard,
+    scan_entries,
+    shard_path,
+    unshard_path,
+    write_layout,
+)
+from .metadata import export_metadata
+from .retention import RetentionPolicy, StoreIndex, SweepReport, sweep
 from .serializer import Serializer
+from .shared import SharedWeights, load_shared
+from .watch import DELETED, ChangeEvent, StoreWatcher
 from .serializers import (
     ByteSerializer,
+    ByteStreamSerializer,
+    CheckpointsSerializer,
+    DataframeSerializer,
     Hdf5Serializer,
     JsonSerializer,
     NdarraySerializer,
+    PickleSerializer,
+    StateDictSerializer,
     WieghtsSerializer,
 )
 
@@ -18,6 +63,11 @@ default_serializers: Set[BaseSerializer] = {
     ByteSerializer,
     JsonSerializer,
     NdarraySerializer,
+    CheckpointsSerializer,
+    ByteStreamSerializer,
+    PickleSerializer,
+    StateDictSerializer,
+    DataframeSerializer,
 }
 
 
@@ -29,30 +79,87 @@ class ModelFile:
         self.__root__ = file_path
 
     @extensionmethod
-    def save(self: str, obj, *, meta=None, serializer=None, overwrite: bool = False):
+    def save(
+        self: str,
+        obj,
+        *,
+        meta=None,
+        serializer=None,
+        overwrite: bool = False,
+        fsync=True,
+        **options,
+    ):
         return app.save(
-            self, obj, meta=meta, serializer=serializer, overwrite=overwrite
+            self,
+            obj,
+            meta=meta,
+            serializer=serializer,
+            overwrite=overwrite,
+            fsync=fsync,
+            **options,
         )
 
     @extensionmethod
     def save_file(
-        self: str, input_path, mode="rb", *, meta=None, overwrite: bool = False
+        self: str,
+        input_path,
+        mode="rb",
+        *,
+        meta=None,
+        overwrite: bool = False,
+        fsync=True,
     ):
         return app.save_file(
-            self, input_path, mode=mode, meta=meta, overwrite=overwrite
+            self, input_path, mode=mode, meta=meta, overwrite=overwrite, fsync=fsync
+        )
+
+    @extensionmethod
+    def save_weights(
+        self: str, obj, *, meta=None, overwrite: bool = False, fsync=True, **options
+    ):
+        return app.save_weights(
+            self, obj, meta=meta, overwrite=overwrite, fsync=fsync, **options
+        )
+
+    @extensionmethod
+    def open_swmr_writer(
+        self: str, kind="weights", *, meta=None, overwrite: bool = False
+    ):
+        return app.open_swmr_writer(self, kind=kind, meta=meta, overwrite=overwrite)
+
+    @extensionmethod
+    def open_writer(
+        self: str,
+        kind="weights",
+        *,
+        meta=None,
+        overwrite: bool = False,
+        fsync=True,
+        **options,
+    ):
+        return app.open_writer(
+            self, kind=kind, meta=meta, overwrite=overwrite, fsync=fsync, **options
         )
 
     @extensionmethod
-    def save_weights(self: str, obj, *, meta=None, overwrite: bool = False):
-        return app.save_weights(self, obj, meta=meta, overwrite=overwrite)
+    def open_swmr_reader(self: str):
+        return app.open_swmr_reader(self)
+
+    @extensionmethod
+    def load(self: str, map=None, **options):
+        return app.load(self, map=map, **options)
 
     @extensionmethod
-    def load(self: str, map=None):
-        return app.load(self, map=map)
+    def load_with(self: str, **options):
+        return app.load_with(self, **options)
 
     @extensionmethod
-    def load_with(self: str):
-        return app.load_with(self)
+    def load_shared(self: str) -> SharedWeights:
+        return load_shared(self)
+
+    @extensionmethod
+    def verify(self: str):
+        return verify_file(self)
 
     @extensionmethod
     def load_meta(self: str):
@@ -66,11 +173,11 @@ class ModelFile:
 
 
 class TempModelFile(ModelFile):
-    def __init__(self):
-        ...
+    def __init__(self, max_published: Optional[int] = DEFAULT_MAX_PUBLISHED):
+        self._max_published = max_published
 
     def __enter__(self):
-        self._tmpdir = InfinityTempNames()
+        self._tmpdir = InfinityTempNames(max_published=self._max_published)
         self.__root__ = self._tmpdir.__enter__().next()
         return self
 
@@ -81,80 +188,507 @@ class TempModelFile(ModelFile):
 
 
 class ModelStore:
-    def __init__(self, path, ignore_exists: bool = False):
-        self._path = RealDir(path, ignore_exists=ignore_exists)
+    _shard_depth = 0
+    _retention: Sequence[RetentionPolicy] = ()
+    _index: Optional[StoreIndex] = None
+    _cache: Optional[ModelCache] = None
+
+    def __init__(
+        self,
+        path,
+        ignore_exists: bool = False,
+        shard_depth: Optional[int] = None,
+        retention: Sequence[RetentionPolicy] = (),
+        cache: Optional[ModelCache] = None,
+    ):
+        """shard_depth: the layout of a new store (default: 0). An existing store is
+            opened with its saved layout, and a different value raises ValueError.
+        cache: serve `load` from memory. It may be shared by stores.
+        """
+        RealDir(path, ignore_exists=ignore_exists)
+        self._path = path
         self._ignore_exists = ignore_exists
+        self._requested_depth = shard_depth
+        self._shard_depth = shard_depth or 0
+        self._retention = retention
+        self._cache = cache
 
     def __enter__(self):
         self._tmpdir = RealDir(self._path, ignore_exists=self._ignore_exists)
         self.__root__ = self._tmpdir.__enter__().dirname
+        try:
+            self._load_layout()
+        except BaseException:
+            self.__exit__()
+            raise
         return self
 
+    def _load_layout(self):
+        layout = read_layout(self.__root__)
+        if layout is None:
+            # a new store, or one created before layouts were saved
+            self._shard_depth = self._requested_depth or 0
+            write_layout(self.__root__, self._shard_depth)
+            return
+        depth = layout["shard_depth"]
+        if self._requested_depth is not None and self._requested_depth != depth:
+            raise ValueError(
+                f"{self.__root__}: the store has shard_depth={depth}, "
+                f"but shard_depth={self._requested_depth} is given."
+            )
+        self._shard_depth = depth
+
     def __exit__(self, *args, **kwargs):
         self._tmpdir.__exit__(*args, **kwargs)
         del self._tmpdir
         del self.__root__
+        self._index = None
+
+    @property
+    def index(self) -> StoreIndex:
+        if self._index is None:
+            self._index = StoreIndex(self.iter_entries, app.load_meta)
+        return self._index
+
+    @property
+    def cache(self) -> Optional[ModelCache]:
+        return self._cache
+
+    def _on_saved(self, path, meta=None):
+        self.index.update(path, meta=meta)
+        if self._cache is not None:
+            self._cache.invalidate(path)
+        if self._retention:
+            self.sweep()
+
+    def _on_loaded(self, path):
+        self.index.touch(path)
+
+    def _on_changed(self, event: ChangeEvent):
+        # changes made by other processes
+        if event.kind == DELETED:
+            self.index.discard(event.path)
+        else:
+            meta = (event.attrs or {}).get("meta", None)
+            self.index.update(event.path, meta=meta if isinstance(meta, dict) else None)
+        if self._cache is not None:
+            self._cache.refresh(event.path)
+
+    def watch(self, interval: float = 1.0, backend: str = "auto") -> StoreWatcher:
+        """Return a watcher which keeps `index` and `cache` of this store up to date.
+
+        backend: "inotify", "poll" or "auto" (inotify if available)
+        """
+        watcher = StoreWatcher(
+            self.__root__, self._shard_depth, interval=interval, backend=backend
+        )
+        watcher.subscribe(self._on_changed)
+        return watcher
+
+    def sweep(self, dry_run: bool = False) -> SweepReport:
+        """Evict entries by the retention policies of this store."""
+        report = sweep(self.index, self._retention, dry_run=dry_run)
+        if self._cache is not None and not dry_run:
+            for path in report.paths:
+                self._cache.invalidate(path)
+        return report
 
     @staticmethod
-    def _join_path(self, file):
+    def _join_path(self, file, create: bool = False):
         if not file:
             raise ValueError()
 
+        if self._shard_depth:
+            if os.sep in str(file):
+                raise ValueError(f"{file}: sharded store does not accept sub directory")
+            file = shard_path(str(file), self._shard_depth)
+
         dir = self.__root__
         joined = os.path.join(dir, file)
         if not (dir == joined[: len(dir)]):
             raise ValueError(f"{file}: {dir}")
 
-        return os.path.abspath(joined)
-
-    def save(self, dest, obj, *, meta=None, serializer=None, overwrite: bool = False):
-        _dest = self._join_path(self, dest)
-        app.save(_dest, obj, meta=meta, serializer=serializer, overwrite=overwrite)
+        joined = os.path.abspath(joined)
+        if create and self._shard_depth:
+            os.makedirs(os.path.dirname(joined), exist_ok=True)
+
+        return joined
+
+    def save(
+        self,
+        dest,
+        obj,
+        *,
+        meta=None,
+        serializer=None,
+        overwrite: bool = False,
+        fsync=True,
+        **options,
+    ):
+        _dest = self._join_path(self, dest, create=True)
+        app.save(
+            _dest,
+            obj,
+            meta=meta,
+            serializer=serializer,
+            overwrite=overwrite,
+            fsync=fsync,
+            **options,
+        )
+        self._on_saved(_dest, meta=meta)
         return _dest
 
     def save_file(
-        self, dest, input_path, mode="rb", *, meta=None, overwrite: bool = False
+        self,
+        dest,
+        input_path,
+        mode="rb",
+        *,
+        meta=None,
+        overwrite: bool = False,
+        fsync=True,
     ):
-        _dest = self._join_path(self, dest)
-        app.save_file(_dest, input_path, mode=mode, meta=meta, overwrite=overwrite)
+        _dest = self._join_path(self, dest, create=True)
+        app.save_file(
+            _dest, input_path, mode=mode, meta=meta, overwrite=overwrite, fsync=fsync
+        )
+        self._on_saved(_dest, meta=meta)
         return _dest
 
-    def save_weights(self, dest, obj, *, meta=None, overwrite: bool = False):
-        _dest = self._join_path(self, dest)
-        app.save_weights(_dest, obj, meta=meta, overwrite=overwrite)
+    def save_weights(
+        self, dest, obj, *, meta=None, overwrite: bool = False, fsync=True, **options
+    ):
+        _dest = self._join_path(self, dest, create=True)
+        app.save_weights(
+            _dest, obj, meta=meta, overwrite=overwrite, fsync=fsync, **options
+        )
+        self._on_saved(_dest, meta=meta)
         return _dest
 
-    def load(self, dest, map=None):
+    def open_swmr_writer(
+        self, dest, kind="weights", *, meta=None, overwrite: bool = False
+    ):
+        _dest = self._join_path(self, dest, create=True)
+        return app.open_swmr_writer(_dest, kind=kind, meta=meta, overwrite=overwrite)
+
+    def open_writer(
+        self,
+        dest,
+        kind="weights",
+        *,
+        meta=None,
+        overwrite: bool = False,
+        fsync=True,
+        **options,
+    ):
+        """Return a writer to `append` layers ("weights") or bytes ("bytes").
+
+        with store.open_writer("model.hdf5") as writer:
+            writer.append(layer)
+        """
+        _dest = self._join_path(self, dest, create=True)
+        return app.open_writer(
+            _dest,
+            kind=kind,
+            meta=meta,
+            overwrite=overwrite,
+            fsync=fsync,
+            on_commit=lambda: self._on_saved(_dest, meta=meta),
+            **options,
+        )
+
+    def open_swmr_reader(self, dest):
         _dest = self._join_path(self, dest)
-        return app.load(_dest, map=map)
+        return app.open_swmr_reader(_dest)
 
-    def load_with(self, dest):
+    def load(self, dest, map=None, cached: bool = True, **options):
+        """cached: use the cache of this store if any.
+
+        Cached values are read into memory (e.g. weights are a list) and their arrays
+        are read-only.
+        """
         _dest = self._join_path(self, dest)
-        return app.load_with(self)
+        self._on_loaded(_dest)
+        if self._cache is None or not cached or map is not None:
+            return app.load(_dest, map=map, **options)
+
+        loader = lambda path: app.load(path, map=materialize, **options)
+        return self._cache.get(_dest, loader, options)
+
+    def load_with(self, dest, **options):
+        _dest = self._join_path(self, dest)
+        self._on_loaded(_dest)
+        return app.load_with(_dest, **options)
+
+    def load_shared(self, dest) -> SharedWeights:
+        """Map weights from shared memory, read once for all processes on the host."""
+        _dest = self._join_path(self, dest)
+        self._on_loaded(_dest)
+        return load_shared(_dest)
+
+    def copy_to(
+        self,
+        other: "ModelStore",
+        keys: Optional[Iterable[str]] = None,
+        workers: int = 0,
+        *,
+        overwrite: bool = False,
+        recompress: Optional[str] = None,
+        compression_opts: Optional[int] = None,
+        fsync=True,
+    ) -> List[str]:
+        """Copy entries to `other` without decoding them. Return the copied paths.
+
+        keys: keys to copy. All entries by default.
+        workers: number of files copied in parallel.
+        recompress: rewrite datasets with the compression "gzip", "lzf" or "none".
+            By default, files are copied as is (with `copy_file_range` if possible).
+        """
+        if keys is None:
+            keys = list(self.keys())
+        pairs = []
+        for key in keys:
+            src = self._join_path(self, key)
+            dest = other._join_path(other, key, create=True)
+            if os.path.abspath(src) == os.path.abspath(dest):
+                raise ValueError(f"{key}: can not copy to itself")
+            pairs.append((src, dest))
+
+        def copy(pair):
+            src, dest = pair
+            if not overwrite and os.path.exists(dest):
+                raise FileExistsError(
+                    "File already exists. "
+                    "If you want to overwrite, set `overwrite=True`"
+                )
+            tmp = atomic_temp_name(dest)
+            try:
+                if recompress is None:
+                    copy_file(src, tmp)
+                else:
+                    compression = None if recompress == "none" else recompress
+                    recompress_file(src, tmp, compression, compression_opts)
+                commit_file(tmp, dest, overwrite=overwrite, fsync=fsync)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            return dest
+
+        if workers:
+            # h5py serializes recompression, but file copies run in parallel
+            with ThreadPoolExecutor(workers) as pool:
+                copied = list(pool.map(copy, pairs))
+        else:
+            copied = [copy(x) for x in pairs]
+
+        for dest in copied:
+            other._on_saved(dest)
+        return copied
+
+    def export_metadata(
+        self,
+        path,
+        format: str = "parquet",
+        workers: int = 0,
+        incremental: bool = False,
+    ) -> int:
+        """Write attrs and flattened meta of all entries to a "parquet" or "npz" file.
+
+        With `workers`, files are read in worker processes. With `incremental`,
+        only files changed since the previous export to `path` are read.
+        Return the number of files read.
+        """
+        dir = os.path.abspath(self.__root__)
+        keys = {
+            x: unshard_path(os.path.relpath(x, dir), self._shard_depth)
+            for x in self.iter_files()
+        }
+        return export_metadata(
+            list(keys),
+            path,
+            format=format,
+            workers=workers,
+            incremental=incremental,
+            keys=keys,
+        )
+
+    def files(self, keys: Optional[Iterable[str]] = None) -> "ModelFileSet":
+        """Return the files of `keys`, or all entries, as a `ModelFileSet`."""
+        if keys is None:
+            return ModelFileSet(self.iter_files())
+        return ModelFileSet(self._join_path(self, key) for key in keys)
+
+    def snapshot(self, keys: Optional[Iterable[str]] = None) -> "StoreSnapshot":
+        """Return a read-only view of the current entries. Close it to remove.
+
+        Entries are hard linked into a hidden directory of the store, so files
+        replaced or evicted afterwards keep their content in the snapshot, and
+        writers are never blocked. Files written in place (swmr) are not isolated.
+        """
+        root = os.path.abspath(self.__root__)
+        dirname = os.path.join(root, SNAPSHOTS_DIR, uuid.uuid4().hex)
+        os.makedirs(dirname)
+        if keys is None:
+            keys = self.keys()
+        try:
+            for key in keys:
+                src = self._join_path(self, key)
+                dest = os.path.join(dirname, key)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                try:
+                    link_file(src, dest)
+                except FileNotFoundError:
+                    if os.path.exists(src):
+                        raise
+                    # removed while iterating
+        except BaseException:
+            shutil.rmtree(dirname, ignore_errors=True)
+            raise
+        return StoreSnapshot(dirname)
 
     def load_meta(self, dest):
         _dest = self._join_path(self, dest)
-        return app.load_meta(self)
+        return app.load_meta(_dest)
 
     def load_info(
         self, dest, attrs=["appname", "name", "created_at", "updated_at", "meta"]
     ):
         _dest = self._join_path(self, dest)
-        return app.load_info(self, attrs=attrs)
+        return app.load_info(_dest, attrs=attrs)
 
-    def list_by_updated_at(self, desc: bool = False):
+    def iter_entries(self) -> Iterator[os.DirEntry]:
+        return scan_entries(os.path.abspath(self.__root__), self._shard_depth)
+
+    def iter_files(self) -> Iterator[str]:
+        return (entry.path for entry in self.iter_entries())
+
+    def keys(self) -> Iterator[str]:
         dir = os.path.abspath(self.__root__)
-        files = (os.path.join(dir, f) for f in os.listdir(dir))
-        files = filter(os.path.isfile, files)
-        return list(sorted(files, key=lambda x: os.path.getmtime(x), reverse=desc))
+        for path in self.iter_files():
+            yield unshard_path(os.path.relpath(path, dir), self._shard_depth)
+
+    def list_by_updated_at(self, desc: bool = False):
+        entries = sorted(
+            self.iter_entries(), key=lambda x: x.stat().st_mtime, reverse=desc
+        )
+        return [entry.path for entry in entries]
+
+    def verify(self, workers: int = 0) -> Dict[str, List[str]]:
+        """Verify checksums of all files. Return errors of corrupted files by path."""
+        return verify(self.iter_files(), workers=workers)
+
+    def reshard(self, shard_depth: int) -> int:
+        """Move existing files to the `shard_depth` layout. e.g. migrate a flat store"""
+        moved = reshard(self.__root__, shard_depth, current_depth=self._shard_depth)
+        self._shard_depth = self._requested_depth = shard_depth
+        self._index = None
+        if self._cache is not None:
+            self._cache.invalidate()
+        return moved
+
+
+SNAPSHOTS_DIR = ".snapshots"
+
+
+class StoreSnapshot:
+    """Read-only view of store entries at a point in time.
+
+    with store.snapshot() as snapshot:
+        for key, weights in snapshot.iter_load(workers=4, map=list):
+            ...
+    """
+
+    def __init__(self, dirname):
+        self.__root__ = dirname
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return not os.path.isdir(self.__root__)
+
+    def close(self):
+        shutil.rmtree(self.__root__, ignore_errors=True)
+
+    def _join_path(self, key):
+        if self.closed:
+            raise ValueError("Snapshot is already closed.")
+        root = os.path.abspath(self.__root__)
+        path = os.path.abspath(os.path.join(root, key))
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise ValueError(f"{key}: {self.__root__}")
+        return path
+
+    def keys(self) -> List[str]:
+        keys = []
+        for dirpath, dirnames, filenames in os.walk(self.__root__):
+            dirnames[:] = [x for x in dirnames if not is_hidden(x)]
+            keys.extend(
+                os.path.relpath(os.path.join(dirpath, x), self.__root__)
+                for x in filenames
+                if not is_hidden(x)
+            )
+        return sorted(keys)
+
+    def __contains__(self, key) -> bool:
+        return os.path.isfile(self._join_path(key))
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def iter_files(self) -> Iterator[str]:
+        return (self._join_path(key) for key in self.keys())
+
+    def load(self, key, map=None, **options):
+        return app.load(self._join_path(key), map=map, **options)
+
+    def load_with(self, key, **options):
+        return app.load_with(self._join_path(key), **options)
+
+    def load_meta(self, key):
+        return app.load_meta(self._join_path(key))
+
+    def iter_load(
+        self,
+        keys: Optional[Iterable[str]] = None,
+        workers: int = 0,
+        map=None,
+        **options,
+    ) -> Iterator[tuple]:
+        """Yield `(key, value)` in order of `keys`, loading with `workers` threads.
+        At most `workers` values are loaded ahead of the caller.
+
+        map: as `load`. Required for values which can not be read after the file
+            is closed, e.g. `map=list` for weights.
+        """
+        keys = self.keys() if keys is None else keys
+        load = lambda key: self.load(key, map=map, **options)
+        yield from _execute(load, keys, workers)
+
+    def __repr__(self):
+        return f"<StoreSnapshot {self.__root__}>"
 
 
 class TempModelStore(ModelStore):
-    def __init__(self):
-        ...
+    def __init__(
+        self,
+        shard_depth: int = 0,
+        retention: Sequence[RetentionPolicy] = (),
+        cache: Optional[ModelCache] = None,
+        max_published: Optional[int] = DEFAULT_MAX_PUBLISHED,
+    ):
+        """max_published: the number of published names kept (None: unlimited)."""
+        self._shard_depth = shard_depth
+        self._retention = retention
+        self._cache = cache
+        self._max_published = max_published
 
     def __enter__(self):
-        self._tmpdir = InfinityTempNames()
+        self._tmpdir = InfinityTempNames(max_published=self._max_published)
         self.__root__ = self._tmpdir.__enter__().dirname
         return self
 
@@ -162,13 +696,14 @@ class TempModelStore(ModelStore):
         self._tmpdir.__exit__(*args, **kwargs)
         del self._tmpdir
         del self.__root__
+        self._index = None
 
     def file(self, name=None, suffix=".hdf5") -> ModelFile:
-        if name is None:
+        if name is None and not self._shard_depth:
             return ModelFile(self._tmpdir.next(suffix=suffix))
         else:
-            file = name + suffix
-            return ModelFile(os.path.join(self._tmpdir.dirname, file))
+            name = os.path.basename(self._tmpdir.next()) if name is None else name
+            return ModelFile(self._join_path(self, name + suffix, create=True))
 
 
 if not TYPE_CHECKING:
@@ -177,6 +712,123 @@ if not TYPE_CHECKING:
         ...
 
 
+class ModelFileSet(Sequence):
+    """Files processed together, opening each file once.
+
+    files = ModelFileSet([f1, f2])
+    metas = files.load_meta()
+    results = files.map(lambda weights, meta: (list(weights), meta["n"]), workers=4)
+
+    With `workers`, files are processed on a thread pool. h5py serializes file
+    access, but `fn` and decompression run in parallel.
+    """
+
+    def __init__(self, files: Iterable):
+        self._files = [x if isinstance(x, ModelFile) else ModelFile(x) for x in files]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ModelFileSet(self._files[index])
+        return self._files[index]
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __repr__(self):
+        return f"ModelFileSet({self._files!r})"
+
+    def load_meta(self, workers: int = 0) -> List[dict]:
+        return self.map(lambda obj, meta: meta, workers=workers, meta_only=True)
+
+    def load(self, layers: Optional[Sequence[int]] = None, workers: int = 0, **options):
+        """Load all files into memory.
+
+        layers: indices of the layers to read from weights, e.g. `[0, -1]`.
+            Other layers are not read.
+        """
+        if layers is None:
+            return self.map(lambda obj, meta: materialize(obj), workers, **options)
+        return self.map(lambda obj, meta: obj, workers, layers=layers, **options)
+
+    def map(
+        self,
+        fn: Callable[[Any, dict], Any],
+        workers: int = 0,
+        *,
+        ordered: bool = True,
+        stream: bool = False,
+        **options,
+    ):
+        """Call `fn(obj, meta)` for each file while the file is open.
+
+        `obj` is the value of `load(**options)`, so lazy values (e.g. weights) can
+        be read in `fn`. Return the results in the order of the files.
+        stream: return an iterator of `(file, result)` instead of a list. Unless
+            `ordered`, pairs are yielded as they complete.
+        """
+        func = lambda file: self._apply(file, fn, options)
+        results = _execute(func, self._files, workers, ordered=ordered)
+        if stream:
+            return results
+        return [result for file, result in results]
+
+    @staticmethod
+    def _apply(file, fn, options):
+        options = dict(options)
+        layers = options.pop("layers", None)
+        meta_only = options.pop("meta_only", False)
+        with h5py.File(file, "r") as f:
+            meta = json.loads(f.attrs["meta"])
+            if meta_only:
+                return fn(None, meta)
+            if layers is None:
+                return fn(app.load(f, **options), meta)
+
+            serializer = app.get_serializer_by_src(f)
+            if serializer is not WieghtsSerializer:
+                raise TypeError(f"{file}: `layers` requires weights. {serializer}")
+            names = list(f)
+            obj = [WieghtsSerializer.read_layer(f[names[i]], **options) for i in layers]
+            return fn(obj, meta)
+
+
+def _execute(func, items: Iterable, workers: int, ordered: bool = True):
+    """Yield `(item, func(item))`. With `workers`, at most `workers` calls are in
+    flight, and the next item is submitted as a result is yielded, so results are
+    not piled up faster than they are consumed.
+    """
+    if not workers:
+        for item in items:
+            yield item, func(item)
+        return
+
+    items = iter(items)
+    pool = ThreadPoolExecutor(workers)
+    pending: dict = {}  # future: item, in order of submission
+
+    def submit(n: int):
+        for item in itertools.islice(items, n):
+            pending[pool.submit(func, item)] = item
+
+    try:
+        submit(workers)
+        while pending:
+            if ordered:
+                future = next(iter(pending))
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = next(x for x in pending if x in done)
+            item = pending.pop(future)
+            result = future.result()
+            submit(1)
+            yield item, result
+    finally:
+        # also when the generator is closed early. running calls are waited for
+        for future in pending:
+            future.cancel()
+        pool.shutdown()
+
+
 # class ModelExtension:
 #     def __init__(self, model):
 #         self.__root__ = model
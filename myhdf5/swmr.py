@@ -0,0 +1,106 @@
+import h5py
+
+from .abc import BaseSerializer
+from .serializers.impl import raise_if_close
+
+"""
+# single writer
+with app.open_swmr_writer("model.hdf5", kind="weights") as writer:
+    for epoch in range(10):
+        ...
+        writer.append(model.get_weights())
+
+# multiple readers (other processes)
+with app.open_swmr_reader("model.hdf5") as reader:
+    while True:
+        if reader.refresh():
+            weights = reader.latest()
+"""
+
+
+class SwmrWriter:
+    def __init__(self, file: h5py.File, serializer: BaseSerializer):
+        self._file = file
+        self._serializer = serializer
+        self._start_swmr()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    @property
+    def file(self) -> h5py.File:
+        return self._file
+
+    def _start_swmr(self):
+        # no object can be created after entering swmr mode,
+        # so the layout must be fixed by the first append.
+        if not self._file.swmr_mode and len(self._file):
+            self._file.swmr_mode = True
+
+    def append(self, obj):
+        raise_if_close(self._file)
+        self._serializer.append(self._file, obj)
+        self._start_swmr()
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SwmrReader:
+    def __init__(self, file: h5py.File, serializer: BaseSerializer):
+        self._file = file
+        self._serializer = serializer
+        self._len = self._length()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    @property
+    def file(self) -> h5py.File:
+        return self._file
+
+    def __len__(self):
+        return self._len
+
+    def _length(self):
+        for ds in self._file.values():
+            return ds.shape[0]
+        return 0
+
+    def refresh(self) -> bool:
+        """Pick up data appended by the writer. Return True if something was added."""
+        raise_if_close(self._file)
+        for ds in self._file.values():
+            ds.refresh()
+        length = self._length()
+        updated = length != self._len
+        self._len = length
+        return updated
+
+    def __getitem__(self, index):
+        """Return the weights of a checkpoint, or a slice of bytes."""
+        raise_if_close(self._file)
+        if "value" in self._file:
+            return self._file["value"][index].tobytes()
+        return [ds[index] for ds in self._file.values()]
+
+    def latest(self):
+        if not self._len:
+            raise IndexError("No checkpoint has been written yet.")
+        return self[self._len - 1]
+
+    def read(self, offset: int = 0) -> bytes:
+        return self[offset : self._len]
+
+    def load(self):
+        return self._serializer.deserialize(self._file)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,314 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import h5py
+
+from .directory import is_hidden, scan_entries
+
+"""
+Change feed of a store directory.
+
+with store.watch(interval=1.0) as watcher:  # refreshes store.index and store.cache
+    unsubscribe = watcher.subscribe(lambda event: print(event.kind, event.path))
+    ...
+
+Changes are detected with inotify on Linux, and by comparing (inode, mtime, size)
+of a directory scan elsewhere. Only the changed files are opened, to read their
+root attrs.
+"""
+
+CREATED, UPDATED, DELETED = "created", "updated", "deleted"
+
+
+class ChangeEvent(NamedTuple):
+    kind: str
+    path: str
+    attrs: Optional[dict]  # root attrs. None if deleted or not readable yet
+
+
+Version = Tuple[int, int, int]
+
+
+def _version(stat: os.stat_result) -> Version:
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def read_attrs(path) -> Optional[dict]:
+    """Read the root attrs of a file. "meta" is decoded from json."""
+    try:
+        with h5py.File(path, "r") as f:
+            attrs = dict(f.attrs)
+    except (OSError, KeyError):
+        return None  # e.g. being written by another process
+    if isinstance(attrs.get("meta", None), str):
+        try:
+            attrs["meta"] = json.loads(attrs["meta"])
+        except ValueError:
+            ...
+    return attrs
+
+
+class PollingBackend:
+    """Report that anything may have changed, after `interval`."""
+
+    def __init__(self, root, depth: int = 0):
+        self.root = root
+        self.depth = depth
+        self._closed = threading.Event()
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """Return changed paths, or None if the whole directory must be compared."""
+        self._closed.wait(timeout)
+        return None
+
+    def close(self):
+        self._closed.set()
+
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyBackend:
+    """inotify watches of the store directory and its shard directories."""
+
+    def __init__(self, root, depth: int = 0):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify is not available.")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.root = root
+        self.depth = depth
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._dirs: Dict[int, Tuple[str, int]] = {}  # wd: (dirname, level)
+        self._overflow = False
+        try:
+            self._add_tree(root, 0)
+        except BaseException:
+            self.close()
+            raise
+
+    def _add_tree(self, dirname, level: int):
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(dirname), ctypes.c_uint32(_MASK)
+        )
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch", dirname)
+        self._dirs[wd] = (dirname, level)
+        if level < self.depth:
+            with os.scandir(dirname) as it:
+                for entry in it:
+                    if not is_hidden(entry.name) and entry.is_dir():
+                        self._add_tree(entry.path, level + 1)
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        if self._fd < 0:
+            return set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        paths: Set[str] = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError:
+                return None  # closed
+            self._parse(buf, paths)
+
+        if self._overflow:
+            self._overflow = False
+            return None
+        return paths
+
+    def _parse(self, buf: bytes, paths: Set[str]):
+        offset = 0
+        while offset < len(buf):
+            wd, mask, cookie, length = _EVENT.unpack_from(buf, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(buf[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._overflow = True
+                continue
+            if wd not in self._dirs:
+                continue
+            dirname, level = self._dirs[wd]
+            if mask & IN_IGNORED:
+                del self._dirs[wd]  # the directory was removed
+                continue
+            if not name or is_hidden(name):
+                continue
+
+            path = os.path.join(dirname, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and level < self.depth:
+                    try:
+                        self._add_tree(path, level + 1)
+                    except OSError:
+                        continue
+                    # files created before the watch was added
+                    paths.update(
+                        x.path for x in scan_entries(path, self.depth - level - 1)
+                    )
+                continue
+            if level == self.depth:
+                paths.add(path)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def make_backend(root, depth: int = 0, backend: str = "auto"):
+    if backend == "poll":
+        return PollingBackend(root, depth)
+    elif backend == "inotify":
+        return InotifyBackend(root, depth)
+    elif backend == "auto":
+        try:
+            return InotifyBackend(root, depth)
+        except (OSError, AttributeError):
+            return PollingBackend(root, depth)
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+
+class StoreWatcher:
+    """Emit created/updated/deleted events of files in a directory to subscribers.
+
+    Events are delivered on the watcher thread, or by calling `poll()`.
+    An exception raised by a subscriber is kept in `errors` and does not stop
+    the other subscribers.
+    """
+
+    def __init__(
+        self, root, depth: int = 0, interval: float = 1.0, backend: str = "auto"
+    ):
+        self.root = os.path.abspath(root)
+        self.depth = depth
+        self.interval = interval
+        self.errors: deque = deque(maxlen=100)
+        self._backend = make_backend(self.root, depth, backend)
+        self._subscribers: List[Callable[[ChangeEvent], None]] = []
+        self._lock = threading.Lock()
+        self._versions = self._scan()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if isinstance(self._backend, InotifyBackend) else "poll"
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+        """Call `callback(event)` for each change. Return a function to unsubscribe."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _scan(self) -> Dict[str, Version]:
+        versions = {}
+        for entry in scan_entries(self.root, self.depth):
+            try:
+                versions[entry.path] = _version(entry.stat())
+            except FileNotFoundError:
+                continue
+        return versions
+
+    def poll(self, timeout: float = 0) -> List[ChangeEvent]:
+        """Wait up to `timeout` for changes, and deliver them to subscribers."""
+        paths = self._backend.wait(timeout)
+        if paths is None:
+            events = self._diff_all()
+        else:
+            events = [x for x in map(self._diff, sorted(paths)) if x is not None]
+
+        for event in events:
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    self.errors.append(e)
+        return events
+
+    def _diff(self, path) -> Optional[ChangeEvent]:
+        prev = self._versions.get(path, None)
+        try:
+            version = _version(os.stat(path))
+        except FileNotFoundError:
+            if prev is None:
+                return None
+            del self._versions[path]
+            return ChangeEvent(DELETED, path, None)
+
+        if version == prev:
+            return None
+        self._versions[path] = version
+        return ChangeEvent(CREATED if prev is None else UPDATED, path, read_attrs(path))
+
+    def _diff_all(self) -> List[ChangeEvent]:
+        versions = self._scan()
+        paths = set(versions) | set(self._versions)
+        return [x for x in map(self._diff, sorted(paths)) if x is not None]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def start(self):
+        if self._thread is not None:
+            raise RuntimeError("Already started.")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self._backend.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll(self.interval)
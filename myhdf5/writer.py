@@ -0,0 +1,184 @@
+import os
+from typing import Callable, Optional
+
+import h5py
+
+from .chunks import write_layers
+from .directory import atomic_temp_name, commit_file
+from .serializers import ByteSerializer, WieghtsSerializer
+from .serializers.impl import raise_if_close
+
+"""
+Write an entry piece by piece, e.g. layers received from the network.
+
+with store.open_writer("model.hdf5", kind="weights") as writer:
+    for layer in receive():
+        writer.append(layer)  # written as it arrives
+# committed here. On an exception, nothing is left
+
+Pieces are written into a hidden temporary file, which is moved to the destination
+on close after the attrs and the checksum are written. The entry is loaded as
+if it was saved at once by `save_weights` ("weights") or `save` of bytes ("bytes").
+"""
+
+
+class WeightsAppender:
+    """Write each appended layer as the next dataset of `WieghtsSerializer`."""
+
+    serializer = WieghtsSerializer
+
+    def __init__(
+        self,
+        grp: h5py.Group,
+        quantize: Optional[str] = None,
+        channel_axis: Optional[int] = None,
+        sparse_threshold: Optional[float] = None,
+        compression: Optional[str] = None,
+        compression_opts: Optional[int] = None,
+    ):
+        self.grp = grp
+        self.quantize = quantize
+        self.channel_axis = channel_axis
+        self.sparse_threshold = sparse_threshold
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.count = 0
+
+    def append(self, layer):
+        items = WieghtsSerializer._iter_datasets(
+            self.grp,
+            [layer],
+            self.quantize,
+            self.channel_axis,
+            self.sparse_threshold,
+            start=self.count,
+        )
+        write_layers(
+            items, compression=self.compression, compression_opts=self.compression_opts
+        )
+        self.count += 1
+
+    def finish(self):
+        # layers are counted by their datasets, so only buffered data is left
+        self.grp.file.flush()
+
+
+class BytesAppender:
+    """Split appended bytes into chunks of the layout of `ByteSerializer`."""
+
+    serializer = ByteSerializer
+    chunksize = 1024 * 32
+
+    def __init__(self, grp: h5py.Group):
+        self.grp = grp
+        self.grp.attrs["chunksize"] = self.chunksize
+        self.count = 0
+        self._buf = bytearray()
+
+    def append(self, buf: bytes):
+        if not isinstance(buf, (bytes, bytearray, memoryview)):
+            raise TypeError()
+        self._buf += buf
+        while len(self._buf) >= self.chunksize:
+            self._write(bytes(self._buf[: self.chunksize]))
+            del self._buf[: self.chunksize]
+
+    def _write(self, row: bytes):
+        ByteSerializer._create_dataset(self.grp, self.count, row)
+        self.count += 1
+
+    def finish(self):
+        if self._buf:
+            self._write(bytes(self._buf))
+            self._buf.clear()
+
+
+appenders = {"weights": WeightsAppender, "bytes": BytesAppender}
+
+
+class StreamWriter:
+    def __init__(
+        self,
+        dest,
+        kind: str = "weights",
+        *,
+        finalize: Callable[[h5py.File, type], None],
+        overwrite: bool = False,
+        fsync=True,
+        on_commit: Optional[Callable[[], None]] = None,
+        **options,
+    ):
+        """finalize: write attrs of the entry to the file before it is committed."""
+        if kind not in appenders:
+            raise ValueError(f"Unknown kind: {kind}")
+        if not overwrite and os.path.exists(dest):
+            raise FileExistsError(
+                "File already exists. If you want to overwrite, set `overwrite=True`"
+            )
+
+        appender = appenders[kind]
+        self.dest = dest
+        self.kind = kind
+        self._finalize = finalize
+        self._overwrite = overwrite
+        self._fsync = fsync
+        self._on_commit = on_commit
+        self._tmp = atomic_temp_name(dest)
+        self._file: Optional[h5py.File] = h5py.File(
+            self._tmp, "w-", track_order=appender.serializer.track_order
+        )
+        try:
+            self._appender = appender(self._file, **options)
+        except BaseException:
+            self.abort()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def __len__(self) -> int:
+        return self._appender.count
+
+    def append(self, piece):
+        if self._file is None:
+            raise ValueError("Writer is already closed.")
+        raise_if_close(self._file)
+        self._appender.append(piece)
+
+    def close(self):
+        """Commit the entry. Nothing is committed if this fails."""
+        if self._file is None:
+            return
+        try:
+            self._appender.finish()
+            self._finalize(self._file, self._appender.serializer)
+            self._file.close()
+            commit_file(
+                self._tmp, self.dest, overwrite=self._overwrite, fsync=self._fsync
+            )
+        except FileExistsError:
+            raise FileExistsError(
+                "File already exists. If you want to overwrite, set `overwrite=True`"
+            )
+        finally:
+            self.abort()
+        if self._on_commit is not None:
+            self._on_commit()
+
+    def abort(self):
+        """Discard the pieces written so far."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
@@ -1,4 +1,7 @@
+import os
+
 import numpy as np
+import pytest
 
 from myhdf5 import ModelFile, TempModelStore
 from myhdf5.aggregate import aggregate
@@ -29,3 +32,126 @@ def test_aggregate():
 
         results = aggregate(list(iterate(f1, f2)))
         assert results
+
+
+def test_aggregate_weighted_average():
+    results = [
+        ([np.array([1.0, 2.0]), np.array(1.0)], 1),
+        ([np.array([3.0, 6.0]), np.array(3.0)], 3),
+    ]
+    actual = aggregate(results)
+    assert np.allclose(actual[0], [2.5, 5.0])
+    assert np.allclose(actual[1], 2.5)
+
+
+def test_aggregate_dtype():
+    results = [
+        ([np.array([100, 120], dtype=np.int8)], 3),
+        ([np.array([100, 0], dtype=np.int8)], 1),
+    ]
+    actual = aggregate(results)
+    assert actual[0].dtype == np.float32
+    assert np.allclose(actual[0], [100, 90])
+
+    actual = aggregate(results, dtype=np.float64)
+    assert actual[0].dtype == np.float64
+
+    with pytest.raises(ValueError):
+        aggregate(results, dtype=np.int64)
+
+
+def test_robust_aggregate():
+    from myhdf5.aggregate import aggregate_median, aggregate_trimmed_mean
+
+    layers = [
+        np.array([[1.0, 2.0, 3.0]]),
+        np.array([[2.0, 3.0, 4.0]]),
+        np.array([[100.0, -100.0, 5.0]]),
+    ]
+    results = [([x], 1) for x in layers]
+
+    actual = aggregate_median(results, chunk_size=2)
+    assert np.array_equal(actual[0], [[2.0, 2.0, 4.0]])
+
+    actual = aggregate_trimmed_mean(
+        results + results[:1], proportiontocut=0.25, chunk_size=2
+    )
+    assert np.array_equal(actual[0], [[1.5, 2.0, 3.5]])
+
+
+def test_running_aggregate():
+    from myhdf5.aggregate import RunningAggregate
+
+    results = [
+        ([np.array([1.0, 2.0]), np.array(1.0)], 1),
+        ([np.array([3.0, 6.0]), np.array(3.0)], 3),
+    ]
+    expect = aggregate(results)
+
+    with TempModelStore() as store:
+        files = []
+        for weights, num_examples in results:
+            f = store.file()
+            f.save_weights(weights)
+            files.append((f, num_examples))
+
+        with RunningAggregate() as agg:
+            for f, num_examples in files:
+                agg.add(f, num_examples)
+            assert agg.count == 2
+            f3 = agg.snapshot(store.file())
+
+        assert f3.load_meta() == {"num_examples": 4, "num_updates": 2}
+        with f3.load_with() as actual:
+            for x, y in zip(actual, expect):
+                assert np.allclose(x, y)
+
+        # resume the on-disk accumulator
+        path = store.file()
+        with RunningAggregate(path=path) as agg:
+            agg.add(*results[0])
+        with RunningAggregate(path=path) as agg:
+            agg.add(*results[1])
+            assert agg.count == 2
+            for x, y in zip(agg.average(), expect):
+                assert np.allclose(x, y)
+
+    with pytest.raises(ValueError):
+        RunningAggregate(dtype=np.int64)
+
+
+def test_running_aggregate_interrupted(monkeypatch):
+    import myhdf5.aggregate
+    from myhdf5.aggregate import RunningAggregate
+
+    results = [
+        ([np.array([1.0, 2.0]), np.array(1.0)], 1),
+        ([np.array([3.0, 6.0]), np.array(3.0)], 3),
+    ]
+
+    with TempModelStore() as store:
+        path = store.file()
+        with RunningAggregate(path=path) as agg:
+            agg.add(*results[0])
+
+        # crash after some layers of the update were summed
+        calls = []
+
+        def accumulate(acc, buf, layer, weight):
+            calls.append(layer)
+            if len(calls) == 2:
+                raise KeyboardInterrupt()
+            np.add(acc, layer * weight, out=acc)
+
+        monkeypatch.setattr(myhdf5.aggregate, "_accumulate", accumulate)
+        with RunningAggregate(path=path) as agg:
+            with pytest.raises(KeyboardInterrupt):
+                agg.add(*results[1])
+        monkeypatch.undo()
+
+        with RunningAggregate(path=path) as agg:
+            assert agg.count == 1
+            agg.add(*results[1])
+            for x, y in zip(agg.average(), aggregate(results)):
+                assert np.allclose(x, y)
+        assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from myhdf5 import TempModelStore
+from myhdf5.cache import ModelCache
+from myhdf5.serializers import PickleSerializer
+
+
+def test_model_cache():
+    cache = ModelCache(max_bytes=1024 * 1024)
+    with TempModelStore(cache=cache) as store:
+        f1 = store.file()
+        f1.save_weights([np.ones(10), np.zeros(3)])
+
+        w1 = store.load(f1)
+        w2 = store.load(f1)
+        assert cache.stats()[:2] == (1, 1)
+        assert w1[0] is w2[0]
+        assert w1 is not w2
+        with pytest.raises(ValueError):
+            w1[0][0] = 2
+
+        f1.save_weights([np.full(10, 2.0)], overwrite=True)
+        np.testing.assert_array_equal(store.load(f1)[0], np.full(10, 2.0))
+
+        store.save(f1, [np.full(10, 3.0)], overwrite=True)
+        assert len(cache) == 0
+        np.testing.assert_array_equal(store.load(f1)[0], np.full(10, 3.0))
+
+        assert store.load(f1, map=list)[0].flags.writeable
+
+
+def test_model_cache_eviction():
+    cache = ModelCache(max_bytes=2500)
+    with TempModelStore(cache=cache) as store:
+        files = [store.file() for i in range(3)]
+        for f in files:
+            f.save_weights([np.ones(128)])  # 1024 bytes
+            store.load(f)
+
+        stats = cache.stats()
+        assert stats.evictions == 1
+        assert stats.entries == 2
+        assert stats.nbytes <= cache.max_bytes
+
+        store.load(files[1])
+        assert cache.stats().hits == 1
+
+
+def test_model_cache_single_flight(tmp_files):
+    cache = ModelCache(max_bytes=1024 * 1024)
+    path = tmp_files.next()
+    with open(path, "w"):
+        ...
+
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        time.sleep(0.1)
+        return [np.ones(3)]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get(path, loader)))
+        for i in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 4
+    assert all(x[0] is results[0][0] for x in results)
+
+
+class Counter:
+    def __init__(self):
+        self.n = 0
+
+
+def test_model_cache_mutable_values():
+    pd = pytest.importorskip("pandas")
+
+    cache = ModelCache(max_bytes=1024 * 1024)
+    with TempModelStore(cache=cache) as store:
+        f1 = store.file()
+        f1.save(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+        df1 = store.load(f1)
+        df1.loc[0, "a"] = 100
+        df2 = store.load(f1)
+        assert df2["a"].tolist() == [1, 2]
+        assert cache.stats().hits == 1
+
+        f2 = store.file()
+        f2.save(Counter(), serializer=PickleSerializer)
+        store.load(f2, allow_pickle=True).n += 1
+        assert store.load(f2, allow_pickle=True).n == 0
+        assert len(cache) == 1  # not cached
+
+
+def test_model_cache_options():
+    cache = ModelCache(max_bytes=1024 * 1024)
+    with TempModelStore(cache=cache) as store:
+        f1 = store.file()
+        f1.save_weights([np.ones(10)])
+        cache.get(f1, lambda path: [np.ones(10)], {"a": 1})
+        cache.get(f1, lambda path: [np.ones(10)], {"a": 2})
+        assert len(cache) == 2
+
+        f1.save_weights([np.zeros(12)], overwrite=True)
+        cache.get(f1, lambda path: [np.zeros(12)])
+        assert len(cache) == 1  # older versions are dropped
+        assert cache.stats().evictions == 0
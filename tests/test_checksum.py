@@ -0,0 +1,56 @@
+import os
+
+import h5py
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFile, TempModelStore
+from myhdf5.exceptions import ChecksumError
+
+
+def corrupt(path, name):
+    with h5py.File(path, "r+") as f:
+        ds = f[name]
+        ds[...] = ds[()] + 1
+
+
+def test_verify_store():
+    with TempModelStore() as store:
+        ok = store.save("ok.hdf5", {"val": 1})
+        weights = store.save_weights("weights.hdf5", [np.zeros(3), np.ones(2)])
+        compressed = store.save_weights(
+            "compressed.hdf5", [np.zeros((100, 3))], compression="gzip", workers=2
+        )
+        assert ModelFile.verify(ok) == []
+        assert store.verify() == {}
+
+        corrupt(weights, "0000000001")
+        with open(compressed, "r+b") as f:
+            f.truncate(os.path.getsize(compressed) // 2)
+
+        errors = store.verify(workers=2)
+        assert sorted(errors) == sorted([weights, compressed])
+        assert "0000000001" in errors[weights][0]
+
+
+def test_verify_on_load():
+    with TempModelStore() as store:
+        f1 = store.file()
+        f1.save_weights([np.zeros(3), np.ones(2)])
+        with f1.load_with(verify=True) as weights:
+            assert len(list(weights)) == 2
+
+        corrupt(f1, "0000000001")
+        with f1.load_with(verify=True) as weights:
+            it = iter(weights)
+            next(it)
+            with pytest.raises(ChecksumError):
+                next(it)
+
+        f2 = store.file()
+        f2.save(np.array([1, 2]))
+        with h5py.File(f2, "r+") as f:
+            f.attrs["value"] = np.array([1, 3])
+        assert f2.verify()
+        with pytest.raises(ChecksumError):
+            f2.load(verify=True)
@@ -0,0 +1,37 @@
+import h5py
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFile
+from myhdf5.chunks import chunk_shape, is_direct_readable
+
+from .conftest import InfinityTempNames, tmp_files
+
+
+def test_chunk_shape():
+    assert chunk_shape((10, 4), 4, target=32) == (2, 4)
+    assert chunk_shape((10, 4), 4, target=1) == (1, 4)
+    assert chunk_shape((3,), 8, target=1024) == (3,)
+
+
+@pytest.mark.parametrize("workers", [0, 4])
+def test_parallel_compressed_weights(tmp_files: InfinityTempNames, workers):
+    rng = np.random.default_rng(0)
+    weights = [
+        rng.standard_normal((1000, 300)).astype(np.float32),
+        np.arange(10),
+        np.array(1.0),
+        np.zeros((0, 3)),
+    ]
+    f1 = tmp_files.next(".hdf5")
+    ModelFile.save_weights(f1, weights, compression="gzip", workers=workers)
+
+    with h5py.File(f1, "r") as f:
+        ds = f["0000000000"]
+        assert is_direct_readable(ds) == bool(workers)
+        # readable through the regular filter pipeline
+        assert np.array_equal(ds[()], weights[0])
+
+    with ModelFile.load_with(f1, workers=4) as actual:
+        for x, y in zip(actual, weights):
+            assert np.array_equal(x, y)
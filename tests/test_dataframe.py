@@ -0,0 +1,60 @@
+import h5py
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFile
+from myhdf5.exceptions import SerializeError
+from myhdf5.serializers import DataframeSerializer
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "step": np.arange(6),
+            "loss": np.linspace(1, 0, 6),
+            "split": pd.Categorical(["train", "valid"] * 3),
+            "tag": ["a", None, "b", "a", "c", "a"],
+            "at": pd.date_range("2022-01-01", periods=6),
+            "ok": [True, False] * 3,
+        }
+    )
+
+
+def test_dataframe_data(tmp_files, df):
+    f1 = tmp_files.next(".hdf5")
+    assert DataframeSerializer.is_instance(df)
+    ModelFile.save(f1, df)
+
+    with h5py.File(f1, "r") as f:
+        assert f.attrs["name"] == DataframeSerializer.name
+        assert len(f["columns"]) == len(df.columns)
+        assert f["columns/000003"].dtype == np.int32  # dictionary encoded
+
+    pd.testing.assert_frame_equal(ModelFile.load(f1), df)
+    pd.testing.assert_frame_equal(ModelFile.load(f1, verify=True), df)
+
+    f2 = tmp_files.next(".hdf5")
+    ModelFile.save(f2, df.set_index("tag"))
+    pd.testing.assert_frame_equal(ModelFile.load(f2), df.set_index("tag"))
+
+
+def test_dataframe_projection(tmp_files, df):
+    f1 = tmp_files.next(".hdf5")
+    ModelFile.save(f1, df)
+
+    actual = ModelFile.load(f1, columns=["tag", "loss"], rows=(2, 5))
+    pd.testing.assert_frame_equal(actual, df[["tag", "loss"]].iloc[2:5])
+
+    with pytest.raises(KeyError):
+        ModelFile.load(f1, columns=["unknown"])
+
+
+def test_dataframe_unsupported(tmp_files):
+    with pytest.raises(SerializeError):
+        ModelFile.save(
+            tmp_files.next(".hdf5"),
+            pd.DataFrame({"x": pd.Series([1, "a"], dtype=object)}),
+        )
@@ -27,3 +27,27 @@ def test_infinity_tempfiles_if_file_not_close():
         f.flush()
 
     assert not os.path.exists(dirname)
+
+
+def test_infinity_temp_names_reserve():
+    with InfinityTempNames(max_published=3) as tmpnames:
+        names = tmpnames.reserve(5, suffix=".hdf5")
+        assert len(set(names)) == 5
+        assert all(x.endswith(".hdf5") for x in names)
+        assert list(tmpnames.names) == names[2:]
+
+    with InfinityTempNames(max_published=0) as tmpnames:
+        tmpnames.next()
+        assert list(tmpnames.names) == []
+
+    with InfinityTempNames() as tmpnames:
+        tmpnames.next()
+        for filename in tmpnames.names:
+            tmpnames.next()  # names is a snapshot
+        assert len(tmpnames.names) == 2
+
+
+def test_touch():
+    with InfinityTempNames() as tmpnames:
+        f1 = tmpnames.touch(".txt")
+        assert os.path.isfile(f1)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFileSet, TempModelStore
+
+
+@pytest.fixture
+def store():
+    with TempModelStore() as store:
+        for i in range(4):
+            store.save_weights(
+                f"{i}.hdf5", [np.full(3, float(i)), np.arange(i + 1)], meta={"n": i}
+            )
+        yield store
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_fileset(store, workers):
+    files = store.files([f"{i}.hdf5" for i in range(4)])
+    assert len(files) == 4
+    assert isinstance(files[1:], ModelFileSet)
+
+    assert files.load_meta(workers=workers) == [{"n": i} for i in range(4)]
+
+    weights = files.load(workers=workers)
+    np.testing.assert_array_equal(weights[2][0], np.full(3, 2.0))
+
+    last = files.load(layers=[-1], workers=workers)
+    assert [len(x) for x in last] == [1, 1, 1, 1]
+    np.testing.assert_array_equal(last[3][0], np.arange(4))
+
+    results = files.map(lambda w, meta: (list(w), meta["n"]), workers=workers)
+    assert [n for w, n in results] == [0, 1, 2, 3]
+
+    pairs = files.map(
+        lambda w, meta: meta["n"], workers=workers, stream=True, ordered=False
+    )
+    assert sorted((str(f), n) for f, n in pairs) == list(zip(files, range(4)))
+
+
+def test_fileset_layers_requires_weights(store):
+    store.save("json.hdf5", {"a": 1})
+    with pytest.raises(TypeError):
+        store.files(["json.hdf5"]).load(layers=[0])
+
+
+def test_fileset_stream_closed_early(store):
+    import time
+
+    calls = []
+
+    def fn(weights, meta):
+        calls.append(meta["n"])
+        time.sleep(0.05)
+        return meta["n"]
+
+    pairs = store.files().map(fn, workers=1, stream=True)
+    assert next(pairs)[1] in range(4)
+    time.sleep(0.2)
+    assert len(calls) <= 2  # not loaded ahead of the consumer
+    pairs.close()  # the pending calls are cancelled
+    assert len(calls) <= 2
+
+    pairs = store.files().map(fn, workers=2, stream=True, ordered=False)
+    assert sorted(n for f, n in pairs) == [0, 1, 2, 3]
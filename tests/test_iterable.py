@@ -0,0 +1,53 @@
+import threading
+
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFile
+from myhdf5.abc.iterable import ReIterable, prefetch
+from myhdf5.exceptions import FileAlreadyClosedError
+
+from .conftest import InfinityTempNames, tmp_files
+
+
+def test_prefetch():
+    assert list(prefetch(iter(range(10)), 2)) == list(range(10))
+
+    def fail():
+        yield 1
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        list(prefetch(fail(), 2))
+
+
+def test_prefetch_cancel():
+    closed = threading.Event()
+
+    def infinity():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    it = ReIterable(infinity).with_prefetch(3)
+    for i, x in enumerate(it):
+        if i == 5:
+            break
+    assert closed.wait(1)
+
+
+def test_load_with_prefetch(tmp_files: InfinityTempNames):
+    weights = [np.arange(i + 1) for i in range(10)]
+    f1 = tmp_files.next(".hdf5")
+    ModelFile.save_weights(f1, weights)
+
+    with ModelFile.load_with(f1, prefetch=2) as actual:
+        for x, y in zip(actual, weights):
+            assert np.array_equal(x, y)
+
+    with pytest.raises(FileAlreadyClosedError):
+        list(ModelFile.load(f1, prefetch=2))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from myhdf5 import TempModelStore
+from myhdf5.metadata import flatten
+
+
+def test_flatten():
+    meta = {"client": "a", "eval": {"acc": 0.9, "loss": None}, "tags": [1, 2]}
+    assert flatten(meta) == {
+        "meta.client": "a",
+        "meta.eval.acc": 0.9,
+        "meta.eval.loss": None,
+        "meta.tags": "[1, 2]",
+    }
+
+
+def test_export_metadata_npz(tmp_files):
+    dest = tmp_files.next(".npz")
+    with TempModelStore(shard_depth=1) as store:
+        store.save("a.hdf5", 1, meta={"round": 1, "eval": {"acc": 0.5}})
+        store.save("b.hdf5", 2, meta={"client": "x"})
+
+        assert store.export_metadata(dest, format="npz") == 2
+        with np.load(dest) as npz:
+            keys = npz["key"].tolist()
+            assert sorted(keys) == ["a.hdf5", "b.hdf5"]
+            row = keys.index("a.hdf5")
+            assert npz["serializer"][row] == "json"
+            assert npz["meta.round"][row] == 1
+            assert npz["meta.eval.acc"][row] == 0.5
+            assert np.isnan(npz["meta.eval.acc"][1 - row])
+            assert npz["meta.client"][1 - row] == "x"
+
+        store.save("c.hdf5", 3)
+        store.save("a.hdf5", 4, meta={"round": 2}, overwrite=True)
+        assert store.export_metadata(dest, format="npz", incremental=True) == 2
+        assert store.export_metadata(dest, format="npz", incremental=True) == 0
+        with np.load(dest) as npz:
+            assert sorted(npz["key"].tolist()) == ["a.hdf5", "b.hdf5", "c.hdf5"]
+            assert "meta.eval.acc" not in npz.files
+
+
+def test_export_metadata_parquet(tmp_files):
+    pq = pytest.importorskip("pyarrow.parquet")
+    dest = tmp_files.next(".parquet")
+    with TempModelStore() as store:
+        store.save("a.hdf5", 1, meta={"round": 1})
+        store.export_metadata(dest, workers=2)
+        rows = pq.read_table(dest).to_pylist()
+        assert rows[0]["key"] == "a.hdf5"
+        assert rows[0]["meta.round"] == 1
+
+
+def test_export_metadata_npz_missing_values(tmp_files):
+    from myhdf5.metadata import read_npz
+
+    dest = tmp_files.next(".npz")
+    with TempModelStore() as store:
+        store.save("a.hdf5", 1, meta={"name": "", "loss": float("nan"), "round": 1})
+        store.save("b.hdf5", 2, meta={})
+        store.export_metadata(dest, format="npz")
+
+        store.save("c.hdf5", 3, meta={"round": 2})
+        assert store.export_metadata(dest, format="npz", incremental=True) == 1
+        rows = {x["key"]: x for x in read_npz(dest)}
+        assert rows["a.hdf5"]["meta.name"] == ""
+        assert np.isnan(rows["a.hdf5"]["meta.loss"])
+        assert rows["a.hdf5"]["meta.round"] == 1
+        assert isinstance(rows["a.hdf5"]["meta.round"], int)
+        assert isinstance(rows["a.hdf5"]["size"], int)
+        assert "meta.name" not in rows["b.hdf5"]
+        assert "meta.round" not in rows["b.hdf5"]
+
+
+def test_export_metadata_without_pyarrow(tmp_files, monkeypatch):
+    import sys
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with TempModelStore() as store:
+        store.save("a.hdf5", 1)
+        with pytest.raises(ImportError, match="npz"):
+            store.export_metadata(tmp_files.next(".parquet"))
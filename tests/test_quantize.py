@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFile
+from myhdf5.quantize import bfloat16_to_float32, float32_to_bfloat16
+
+from .conftest import InfinityTempNames, tmp_files
+
+
+def test_bfloat16():
+    x = np.array([1.0, -2.5, 3.140625, np.inf, np.nan], dtype=np.float32)
+    actual = bfloat16_to_float32(float32_to_bfloat16(x))
+    assert np.array_equal(actual[:4], x[:4])
+    assert np.isnan(actual[4])
+
+
+@pytest.mark.parametrize(
+    "quantize, channel_axis, atol",
+    [
+        ("float16", None, 1e-3),
+        ("bfloat16", None, 1e-2),
+        ("int8", None, 2 / 255),
+        ("int8", -1, 2 / 255),
+    ],
+)
+def test_quantized_weights(tmp_files: InfinityTempNames, quantize, channel_axis, atol):
+    rng = np.random.default_rng(0)
+    weights = [
+        rng.uniform(-1, 1, (8, 4)).astype(np.float32),
+        rng.uniform(-1, 1, 4),
+        np.arange(3),
+        np.array(0.5, dtype=np.float32),
+    ]
+
+    f1 = tmp_files.next(".hdf5")
+    ModelFile.save_weights(f1, weights, quantize=quantize, channel_axis=channel_axis)
+
+    with ModelFile.load_with(f1) as actual:
+        actual = list(actual)
+
+    for x, y in zip(actual, weights):
+        assert x.dtype == y.dtype
+        assert x.shape == y.shape
+        assert np.allclose(x, y, atol=atol)
+    assert np.array_equal(actual[2], weights[2])
+
+    with ModelFile.load_with(f1, dequantize=False) as raw:
+        assert next(iter(raw)).dtype != np.float32
+
+
+def test_scalar_layer_is_ndarray(tmp_files: InfinityTempNames):
+    f1 = tmp_files.next(".hdf5")
+    ModelFile.save_weights(f1, [np.array(0.5)], quantize="float16")
+    with ModelFile.load_with(f1) as actual:
+        assert all(isinstance(x, np.ndarray) for x in actual)
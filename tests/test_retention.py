@@ -0,0 +1,76 @@
+import os
+import time
+
+from myhdf5 import TempModelStore
+from myhdf5.retention import TTL, KeepLastN, MaxTotalBytes, RetentionSweeper
+
+
+def _set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+def test_keep_last_n_per_meta_key():
+    with TempModelStore(retention=[KeepLastN(2, key="client")]) as store:
+        for i in range(4):
+            path = store.save(f"a_{i}.hdf5", i, meta={"client": "a"})
+            _set_mtime(path, 1000 + i)
+            store.index.update(path)
+        store.save("b_0.hdf5", 0, meta={"client": "b"})
+        store.save("none.hdf5", 0)
+
+        assert sorted(store.keys()) == ["a_2.hdf5", "a_3.hdf5", "b_0.hdf5", "none.hdf5"]
+
+
+def test_max_total_bytes_lru_and_dry_run():
+    with TempModelStore() as store:
+        paths = [store.save(f"{i}.hdf5", i) for i in range(3)]
+        store.load("0.hdf5")
+        size = os.path.getsize(paths[0])
+
+        store._retention = [MaxTotalBytes(size * 2)]
+        report = store.sweep(dry_run=True)
+        assert report.paths == [paths[1]]
+        assert all(os.path.exists(x) for x in paths)
+
+        report = store.sweep()
+        assert report.freed_bytes == size
+        assert sorted(store.keys()) == ["0.hdf5", "2.hdf5"]
+
+
+def test_ttl_with_sweeper():
+    with TempModelStore() as store:
+        old = store.save("old.hdf5", 0)
+        store.save("new.hdf5", 0)
+        _set_mtime(old, time.time() - 100)
+
+        store._retention = [TTL(50)]
+        with RetentionSweeper(store, interval=0.01, rescan=True) as sweeper:
+            for i in range(100):
+                if sweeper.last_report is not None:
+                    break
+                time.sleep(0.01)
+
+        assert list(store.keys()) == ["new.hdf5"]
+
+
+def test_max_total_bytes_lru_counts_loads_before_index():
+    with TempModelStore() as store:
+        paths = [store.save(f"{i}.hdf5", i) for i in range(2)]
+        for path in paths:
+            _set_mtime(path, 1000)  # atime is not updated by reads, e.g. noatime
+        assert not store.index.loaded
+
+        for key in ["0.hdf5", "1.hdf5", "0.hdf5"]:
+            store.load(key)
+            for path in paths:
+                _set_mtime(path, 1000)
+            time.sleep(0.01)
+
+        size = os.path.getsize(paths[0])
+        store._retention = [MaxTotalBytes(size, by="lru")]
+        assert store.sweep(dry_run=True).paths == [paths[1]]
+        hits = {x.path: x.hits for x in store.index.entries()}
+        assert hits == {paths[0]: 2, paths[1]: 1}
+
+        store._retention = [MaxTotalBytes(size, by="lfu")]
+        assert store.sweep(dry_run=True).paths == [paths[1]]
@@ -1,5 +1,6 @@
 import io
 import os
+from dataclasses import dataclass
 from functools import partial
 from typing import Type
 
@@ -8,12 +9,14 @@ import numpy as np
 import pytest
 
 from myhdf5 import BaseSerializer, ModelFile
-from myhdf5.exceptions import FileAlreadyClosedError
+from myhdf5.exceptions import FileAlreadyClosedError, SerializeError
 from myhdf5.serializers import (
     ByteSerializer,
     Hdf5Serializer,
     JsonSerializer,
     NdarraySerializer,
+    PickleSerializer,
+    StateDictSerializer,
     WieghtsSerializer,
 )
 
@@ -36,9 +39,13 @@ def hdf5(tmp_files: InfinityTempNames):
         (True, True),
         ([], True),
         ({}, True),
+        ([1, {"a": [None]}], True),
         # invalid types
         (b"", False),
         (np.array([]), False),
+        ({"a": np.array([])}, False),
+        ({1: "a"}, False),
+        ({1, 2}, False),
     ],
 )
 def test_json_types(val, expect):
@@ -246,3 +253,113 @@ def test_save_weights(tmp_files: InfinityTempNames):
 
         for row1, row2 in zip_longest(weights_1, weights_2):
             np.equal(row1, row2)
+
+
+def test_overwrite_is_atomic(tmp_files: InfinityTempNames):
+    f1 = tmp_files.next(".hdf5")
+    ModelFile.save(f1, {"val": 1})
+
+    with pytest.raises(Exception):
+        ModelFile.save(f1, float("nan"), overwrite=True)
+
+    assert ModelFile.load(f1) == {"val": 1}
+    assert os.listdir(tmp_files.dirname) == [os.path.basename(f1)]
+
+
+def test_save_with_fsync_batch(tmp_files: InfinityTempNames):
+    from myhdf5.directory import FsyncBatch
+
+    with FsyncBatch(max_pending=2) as batch:
+        files = [tmp_files.next(".hdf5") for i in range(3)]
+        for i, f in enumerate(files):
+            ModelFile.save(f, i, fsync=batch)
+
+    assert [ModelFile.load(f) for f in files] == [0, 1, 2]
+
+
+@dataclass
+class _Estimator:
+    coef: np.ndarray
+    params: dict
+
+
+def _is_mapped(arr):
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        arr = getattr(arr, "base", None)
+    return False
+
+
+def test_pickle_data(tmp_files: InfinityTempNames):
+    f1 = tmp_files.next(".hdf5")
+    expect = _Estimator(np.arange(1000.0).reshape(10, 100), {"alpha": 0.1, "tags": {1}})
+    with pytest.raises(Exception):
+        ModelFile.save(f1, expect)  # not chosen by value
+    ModelFile.save(f1, expect, serializer=PickleSerializer)
+
+    with h5py.File(f1, "r") as f:
+        assert f.attrs["name"] == PickleSerializer.name
+        # the array is stored out-of-band, not in the pickle stream
+        assert len(f["buffers"]) == 1
+        assert f["pickle"].size < expect.coef.nbytes
+        assert all("checksum" in x.attrs for x in f["buffers"].values())
+
+    with pytest.raises(SerializeError):
+        ModelFile.load(f1)
+    assert ModelFile.verify(f1) == []
+
+    actual = ModelFile.load(f1, allow_pickle=True)
+    assert _is_mapped(actual.coef)
+    np.testing.assert_array_equal(actual.coef, expect.coef)
+    assert actual.params == expect.params
+
+    actual = ModelFile.load(f1, lazy=False, allow_pickle=True)
+    assert not _is_mapped(actual.coef)
+
+    f2 = tmp_files.next(".hdf5")
+    ModelFile.save(f2, {"a": np.array([1, 2]), "b": "x"}, serializer=PickleSerializer)
+    actual = ModelFile.load(f2, allow_pickle=True)
+    np.testing.assert_array_equal(actual["a"], [1, 2])
+    assert actual["b"] == "x"
+
+
+def test_state_dict_data(tmp_files: InfinityTempNames):
+    f1 = tmp_files.next(".hdf5")
+    expect = {
+        "encoder.0.weight": np.ones((2, 3), dtype=np.float32),
+        "encoder.0.bias": np.zeros(3, dtype=np.float32),
+        "head": np.arange(4),
+    }
+    assert StateDictSerializer.is_instance(expect)
+    ModelFile.save(f1, expect)
+
+    with h5py.File(f1, "r") as f:
+        assert isinstance(f["encoder/0/weight"], h5py.Dataset)
+
+    with ModelFile.load_with(f1) as actual:
+        assert list(actual) == list(expect)
+        assert "encoder.0" not in actual
+        np.testing.assert_array_equal(
+            actual["encoder.0.weight"], expect["encoder.0.weight"]
+        )
+        with pytest.raises(KeyError):
+            actual["encoder"]
+
+    with pytest.raises(FileAlreadyClosedError):
+        actual["head"]
+
+    with pytest.raises(SerializeError):
+        ModelFile.save(tmp_files.next(".hdf5"), {"a": np.ones(1), "a.b": np.ones(1)})
+    with pytest.raises(SerializeError):
+        ModelFile.save(
+            tmp_files.next(".hdf5"), {"a": np.ones(1), "a.b": np.ones(1)}, workers=2
+        )
+
+    # keys of a prefix are not contiguous
+    f2 = tmp_files.next(".hdf5")
+    expect = {"a.x": np.ones(1), "b": np.ones(2), "a.y": np.ones(3)}
+    ModelFile.save(f2, expect, workers=2)
+    with ModelFile.load_with(f2) as actual:
+        assert list(actual) == ["a.x", "b", "a.y"]
+        assert actual["a.y"].shape == (3,)
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFile
+from myhdf5.exceptions import SerializeError
+from myhdf5.shared import _segments, load_shared, unlink_shared
+
+pytest.importorskip("fcntl")
+
+
+def test_load_shared(tmp_files):
+    f1 = ModelFile(tmp_files.next(".hdf5"))
+    expect = [np.arange(10.0), np.ones((3, 4), dtype=np.float32), np.array(5)]
+    f1.save_weights(expect)
+
+    with f1.load_shared() as weights:
+        assert len(weights) == 3
+        for actual, layer in zip(weights, expect):
+            np.testing.assert_array_equal(actual, layer)
+            assert actual.dtype == layer.dtype
+            assert not actual.flags.writeable
+
+        code = (
+            "import sys; from myhdf5.shared import load_shared\n"
+            "with load_shared(sys.argv[1]) as w: print(w.name, w[1].sum())"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code, f1], capture_output=True, text=True, check=True
+        )
+        assert out.stdout.split() == [weights.name, "12.0"]
+
+    # kept for processes started later, until the file is updated
+    assert len(_segments(f1)) == 1
+    with load_shared(f1) as weights:
+        f1.save_weights([np.zeros(2)], overwrite=True)
+    assert _segments(f1) == []
+
+    with load_shared(f1) as weights:
+        np.testing.assert_array_equal(weights[0], np.zeros(2))
+    assert unlink_shared(f1) == 1
+    assert _segments(f1) == []
+
+
+def test_load_shared_not_weights(tmp_files):
+    f1 = ModelFile(tmp_files.next(".hdf5"))
+    f1.save({"a": 1})
+    with pytest.raises(SerializeError):
+        load_shared(f1)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFile
+from myhdf5.aggregate import RunningAggregate, aggregate
+from myhdf5.sparse import SparseLayer
+
+from .conftest import InfinityTempNames, tmp_files
+
+
+def make_weights():
+    pruned = np.zeros((10, 10), dtype=np.float32)
+    pruned[1, 2] = 1.5
+    pruned[9, 9] = -2.0
+    return [pruned, np.ones(3, dtype=np.float32)]
+
+
+def test_sparse_layer():
+    dense = make_weights()[0]
+    layer = SparseLayer.from_dense(dense)
+    assert layer.sparsity == 0.98
+    assert np.array_equal(layer.todense(), dense)
+
+    out = np.ones_like(dense)
+    layer.accumulate(out, 2)
+    assert np.array_equal(out, dense * 2 + 1)
+
+    out = np.ones((10, 20), dtype=np.float32)[:, ::2]  # not contiguous
+    layer.accumulate(out, 2)
+    assert np.array_equal(out, dense * 2 + 1)
+
+    duplicated = SparseLayer(
+        np.array([5, 5, 7], dtype=np.uint32), np.array([1.0, 2.0, 3.0]), (10,)
+    )
+    out = np.zeros(10)
+    duplicated.accumulate(out)
+    assert out[5] == 3.0 and out[7] == 3.0
+
+
+def test_sparse_weights(tmp_files: InfinityTempNames):
+    weights = make_weights()
+    f1 = tmp_files.next(".hdf5")
+    ModelFile.save_weights(f1, weights, sparse_threshold=0.5, quantize="float16")
+
+    with ModelFile.load_with(f1) as actual:
+        for x, y in zip(actual, weights):
+            assert np.array_equal(x, y)
+
+    with ModelFile.load_with(f1, sparse="coo") as actual:
+        actual = list(actual)
+        assert isinstance(actual[0], SparseLayer)
+        assert isinstance(actual[1], np.ndarray)
+
+    scipy = pytest.importorskip("scipy")
+    with ModelFile.load_with(f1, sparse="scipy") as actual:
+        assert np.array_equal(next(iter(actual)).toarray(), weights[0])
+
+
+def test_aggregate_sparse_updates(tmp_files: InfinityTempNames):
+    weights = make_weights()
+    sparse = [SparseLayer.from_dense(weights[0]), weights[1]]
+    expect = aggregate([(weights, 1), (weights, 3)])
+
+    actual = aggregate([(sparse, 1), (sparse, 3)])
+    for x, y in zip(actual, expect):
+        assert np.allclose(x, y)
+
+    f1 = tmp_files.next(".hdf5")
+    ModelFile.save_weights(f1, sparse)
+    with RunningAggregate() as agg:
+        agg.add(f1, 1)
+        agg.add(sparse, 3)
+        for x, y in zip(agg.average(), expect):
+            assert np.allclose(x, y)
+
+
+def test_toscipy_without_scipy(monkeypatch):
+    import sys
+
+    monkeypatch.setitem(sys.modules, "scipy", None)
+    monkeypatch.setitem(sys.modules, "scipy.sparse", None)
+    layer = SparseLayer.from_dense(make_weights()[0])
+    with pytest.raises(ImportError, match="h5pyex\\[sparse\\]"):
+        layer.toscipy()
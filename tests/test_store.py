@@ -1,3 +1,7 @@
+import os
+
+import pytest
+
 from myhdf5 import TempModelStore
 
 
@@ -17,3 +21,138 @@ def test_temp_model_store():
 
         result = store.list_by_updated_at()
         assert result
+
+
+def test_sharded_model_store(tmp_files):
+    from myhdf5.store import ModelStore
+
+    with ModelStore(tmp_files.dirname + "/store") as store:
+        store.save("a.hdf5", 1)
+        store.save("b.hdf5", 2)
+        assert sorted(os.listdir(store.__root__)) == [".layout", "a.hdf5", "b.hdf5"]
+
+        assert store.reshard(2) == 2
+        assert store.load("a.hdf5") == 1
+        store.save("c.hdf5", 3)
+        assert sorted(store.keys()) == ["a.hdf5", "b.hdf5", "c.hdf5"]
+        assert len(store.list_by_updated_at()) == 3
+        assert "a.hdf5" not in os.listdir(store.__root__)
+
+    # the layout is saved with the store
+    with ModelStore(tmp_files.dirname + "/store", True) as store:
+        assert sorted(store.keys()) == ["a.hdf5", "b.hdf5", "c.hdf5"]
+        assert len(store.list_by_updated_at()) == 3
+
+    with pytest.raises(ValueError):
+        with ModelStore(tmp_files.dirname + "/store", True, shard_depth=1):
+            ...
+
+    with ModelStore(tmp_files.dirname + "/store", True, shard_depth=2) as store:
+        assert store.load_meta("c.hdf5") == {}
+        store.reshard(0)
+        assert sorted(store.keys()) == ["a.hdf5", "b.hdf5", "c.hdf5"]
+
+        os.mkdir(os.path.join(store.__root__, "sub"))
+        store.save("sub/d.hdf5", 4)
+        with pytest.raises(ValueError):
+            store.reshard(1)
+        assert store.load("sub/d.hdf5") == 4
+
+
+def test_sharded_temp_model_store():
+    with TempModelStore(shard_depth=1) as store:
+        f1 = store.file()
+        f1.save(1)
+        assert os.path.dirname(os.path.dirname(f1)) == store.__root__
+        assert list(store.iter_files()) == [f1]
+
+
+def test_temp_model_store_max_published():
+    with TempModelStore(max_published=2) as store:
+        files = [store.file() for i in range(3)]
+        assert store._tmpdir.names == files[1:]
+
+
+def test_copy_to():
+    import h5py
+    import numpy as np
+
+    with TempModelStore() as src, TempModelStore(shard_depth=1) as dest:
+        layers = [np.zeros((100, 10)), np.arange(3)]
+        src.save_weights("a.hdf5", layers, meta={"stage": "train"})
+        src.save("b.hdf5", {"x": 1})
+
+        copied = src.copy_to(dest, workers=2)
+        assert sorted(dest.keys()) == ["a.hdf5", "b.hdf5"]
+        assert sorted(copied) == sorted(dest.iter_files())
+        assert dest.load_meta("a.hdf5") == {"stage": "train"}
+        assert dest.load("b.hdf5") == {"x": 1}
+        assert len(dest.index.entries()) == 2
+
+        with pytest.raises(FileExistsError):
+            src.copy_to(dest, ["b.hdf5"])
+
+        (path,) = src.copy_to(dest, ["a.hdf5"], overwrite=True, recompress="gzip")
+        with h5py.File(path, "r") as f:
+            assert [ds.compression for ds in f.values()] == ["gzip", "gzip"]
+        assert dest.verify() == {}
+        actual = dest.load("a.hdf5", map=list)
+        for a, b in zip(actual, layers):
+            np.testing.assert_array_equal(a, b)
+
+
+def test_snapshot():
+    import numpy as np
+
+    with TempModelStore(shard_depth=1) as store:
+        store.save("a.hdf5", 1)
+        store.save_weights("b.hdf5", [np.ones(3)])
+
+        with store.snapshot() as snapshot:
+            store.save("a.hdf5", 2, overwrite=True)
+            store.save("c.hdf5", 3)
+            os.remove(store._join_path(store, "b.hdf5"))
+
+            assert snapshot.keys() == ["a.hdf5", "b.hdf5"]
+            assert snapshot.load("a.hdf5") == 1
+            values = dict(snapshot.iter_load(["b.hdf5"], workers=2, map=list))
+            np.testing.assert_array_equal(values["b.hdf5"][0], np.ones(3))
+            assert sorted(store.keys()) == ["a.hdf5", "c.hdf5"]
+
+        assert snapshot.closed
+        assert os.listdir(os.path.join(store.__root__, ".snapshots")) == []
+        assert store.load("a.hdf5") == 2
+
+
+def test_snapshot_nested_key():
+    with TempModelStore() as store:
+        os.mkdir(os.path.join(store.__root__, "sub"))
+        store.save("sub/a.hdf5", 1)
+        store.save("b.hdf5", 2)
+
+        with store.snapshot(["sub/a.hdf5", "b.hdf5", "removed.hdf5"]) as snapshot:
+            assert snapshot.keys() == ["b.hdf5", os.path.join("sub", "a.hdf5")]
+            assert snapshot.load("sub/a.hdf5") == 1
+            with pytest.raises(ValueError):
+                snapshot.load("../b.hdf5")
+
+
+def test_snapshot_iter_load_bounded():
+    import time
+
+    with TempModelStore() as store:
+        for i in range(6):
+            store.save(f"{i}.hdf5", i)
+
+        loaded = []
+
+        def record(value):
+            loaded.append(value)
+            return value
+
+        with store.snapshot() as snapshot:
+            values = snapshot.iter_load(workers=2, map=record)
+            assert next(values) == ("0.hdf5", 0)
+            time.sleep(0.1)
+            assert len(loaded) <= 3
+            assert [k for k, v in values] == [f"{i}.hdf5" for i in range(1, 6)]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from myhdf5 import ModelFile
+
+from .conftest import InfinityTempNames, tmp_files
+
+
+def test_swmr_weights(tmp_files: InfinityTempNames):
+    f1 = tmp_files.next(".hdf5")
+    weights = [np.zeros((2, 3)), np.zeros(4)]
+
+    with ModelFile.open_swmr_writer(f1, meta={"val": 1}) as writer:
+        writer.append(weights)
+
+        with ModelFile.open_swmr_reader(f1) as reader:
+            assert len(reader) == 1
+            assert not reader.refresh()
+
+            writer.append([x + 1 for x in weights])
+            assert reader.refresh()
+            assert len(reader) == 2
+            latest = reader.latest()
+            for actual, expect in zip(latest, weights):
+                assert np.array_equal(actual, expect + 1)
+
+            with pytest.raises(ValueError):
+                writer.append(weights[:1])
+
+    assert ModelFile.load_meta(f1) == {"val": 1}
+    with ModelFile.load_with(f1) as actual:
+        assert [x.tolist() for x in actual] == [x.tolist() for x in latest]
+
+
+def test_swmr_bytes(tmp_files: InfinityTempNames):
+    f1 = tmp_files.next(".hdf5")
+
+    with ModelFile.open_swmr_writer(f1, kind="bytes") as writer:
+        writer.append(b"abc")
+        with ModelFile.open_swmr_reader(f1) as reader:
+            assert reader.read() == b"abc"
+            writer.append(b"de")
+            reader.refresh()
+            assert reader.read(offset=3) == b"de"
+
+    with ModelFile.load_with(f1) as val:
+        assert b"".join(val) == b"abcde"
@@ -0,0 +1,73 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from myhdf5 import TempModelStore
+from myhdf5.cache import ModelCache
+from myhdf5.watch import CREATED, DELETED, UPDATED, StoreWatcher
+
+
+def poll_until(watcher: StoreWatcher, n: int, timeout=5.0):
+    events = []
+    deadline = time.monotonic() + timeout
+    while len(events) < n and time.monotonic() < deadline:
+        events += watcher.poll(0.1)
+    return events
+
+
+@pytest.mark.parametrize("backend", ["poll", "inotify"])
+@pytest.mark.parametrize("shard_depth", [0, 1])
+def test_store_watcher(backend, shard_depth):
+    with TempModelStore(shard_depth=shard_depth) as store:
+        f1 = store.file()
+        f1.save(1)
+        try:
+            watcher = StoreWatcher(
+                store.__root__, shard_depth, interval=0.1, backend=backend
+            )
+        except OSError:
+            pytest.skip("inotify is not available")
+
+        received = []
+        unsubscribe = watcher.subscribe(received.append)
+        watcher.start()
+        watcher.stop()
+        assert received == []
+
+        f2 = store.file()
+        f2.save(2, meta={"client": "a"})
+        events = poll_until(watcher, 1)
+        assert [(x.kind, x.path) for x in events] == [(CREATED, f2)]
+        assert events[0].attrs["meta"] == {"client": "a"}
+        assert received == events
+
+        f1.save(3, overwrite=True)
+        assert [(x.kind, x.path) for x in poll_until(watcher, 1)] == [(UPDATED, f1)]
+
+        os.remove(f2)
+        unsubscribe()
+        assert [(x.kind, x.path) for x in poll_until(watcher, 1)] == [(DELETED, f2)]
+        assert len(received) == 2
+        watcher.close()
+
+
+def test_store_watch_refreshes_store():
+    cache = ModelCache(max_bytes=1024 * 1024)
+    with TempModelStore(cache=cache) as store:
+        f1 = store.file()
+        f1.save_weights([np.ones(3)])
+        store.load(f1)
+        assert len(store.index.entries()) == 1
+
+        watcher = store.watch(backend="poll")
+        f2 = store.file()
+        f2.save({}, meta={"client": "b"})  # e.g. by another process
+        f1.save_weights([np.zeros(3)], overwrite=True)
+        watcher.poll()
+
+        entries = {x.path: x for x in store.index.entries()}
+        assert entries[f2].meta == {"client": "b"}
+        assert len(cache) == 0
+        watcher.close()
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+
+from myhdf5 import TempModelStore
+
+
+def test_open_writer_weights():
+    with TempModelStore() as store:
+        layers = [np.arange(6.0).reshape(2, 3), np.ones(4, dtype=np.float32)]
+        with store.open_writer("a.hdf5", meta={"round": 1}) as writer:
+            for layer in layers:
+                writer.append(layer)
+            assert len(writer) == 2
+            assert list(store.keys()) == []  # not visible until closed
+
+        assert list(store.keys()) == ["a.hdf5"]
+        assert store.load_meta("a.hdf5") == {"round": 1}
+        actual = store.load("a.hdf5", map=list, verify=True)
+        for a, b in zip(actual, layers):
+            np.testing.assert_array_equal(a, b)
+
+        with pytest.raises(FileExistsError):
+            store.open_writer("a.hdf5")
+
+
+def test_open_writer_bytes():
+    with TempModelStore() as store:
+        data = os.urandom(100 * 1024)
+        with store.open_writer("a.bin", kind="bytes") as writer:
+            for i in range(0, len(data), 10000):
+                writer.append(data[i : i + 10000])
+
+        assert b"".join(store.load("a.bin", map=list)) == data
+
+
+def test_open_writer_abort():
+    with TempModelStore() as store:
+        with pytest.raises(RuntimeError):
+            with store.open_writer("a.hdf5") as writer:
+                writer.append(np.ones(3))
+                raise RuntimeError()
+
+        writer = store.open_writer("b.hdf5")
+        writer.append(np.ones(3))
+        writer.abort()
+
+        assert os.listdir(store.__root__) == []